@@ -1,32 +1,29 @@
 import pandas as pd
 import os
+import sys
 from collections import Counter
 
+# 저장소 루트의 공용 모듈(workbook_io, fffd_index) 사용
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from workbook_io import read_workbook
+from fffd_index import find_fffd_cells
+
 # 파일 경로
 excel_path = r"C:\Jimin\pharmaLex_sentinel\data\요양심사약제_후처리.xlsx"
 
-# Excel 전체 시트 불러오기
-xls = pd.ExcelFile(excel_path)
+# Excel 전체 시트 불러오기 + � 셀 색인 (컬럼 단위 벡터화)
+hits = find_fffd_cells(read_workbook(excel_path, copy=False))
 
-report = []  # 결과 담을 리스트
 char_counter = Counter()
-
-for sheet in xls.sheet_names:
-    df = pd.read_excel(excel_path, sheet_name=sheet, dtype=str)  # 문자열로 읽기
-    for col in df.columns:
-        for idx, val in df[col].items():
-            if pd.isna(val):
-                continue
-            if "�" in val:  # replacement character 포함 여부
-                count = val.count("�")
-                char_counter["�"] += count
-                report.append({
-                    "sheet": sheet,
-                    "row": idx + 2,   # 엑셀은 보통 헤더 포함하므로 +2
-                    "column": col,
-                    "value": val,
-                    "count_in_cell": count
-                })
+if len(hits):
+    char_counter["�"] += int(hits["count_in_cell"].sum())
+report = [{
+    "sheet": h.sheet,
+    "row": h.row_idx + 2,   # 엑셀은 보통 헤더 포함하므로 +2
+    "column": h.column,
+    "value": h.value,
+    "count_in_cell": h.count_in_cell
+} for h in hits.itertuples(index=False)]
 
 # 전체 빈도 요약
 print("총 발견 건수:", len(report))
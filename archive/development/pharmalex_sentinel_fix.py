@@ -18,50 +18,44 @@ PharmaLex Sentinel — 단위/기호 정규화 · 패치 파이프라인 (최종
 """
 
 import os
-import re
+import sys
 import json
 import math
 import datetime as dt
 import pandas as pd
 
+# 저장소 루트의 공용 모듈(rule_pack 등) 사용
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from rule_pack import load_rule_pack
+from keyword_matcher import classify_context
+from unit_normalizer import normalize_units, prefilter_mask
+
 # ===================== 사용자 설정 =====================
-BASE_DIR = r"C:\Jimin\pharmaLex_sentinel"  # 형님 환경 경로
-IN_EXCEL = os.path.join(BASE_DIR, r"data\요양심사약제_후처리.xlsx")
-OCR_CSV  = os.path.join(BASE_DIR, r"out\ocr_unit_anomalies_scan.csv")
+BASE_DIR = os.environ.get("PHARMALEX_BASE", r"C:\Jimin\pharmaLex_sentinel")  # 형님 환경 경로 (환경변수 PHARMALEX_BASE로 변경 가능)
+IN_EXCEL = os.path.join(BASE_DIR, "data", "요양심사약제_후처리.xlsx")
+OCR_CSV  = os.path.join(BASE_DIR, "out", "ocr_unit_anomalies_scan.csv")
 
 OUT_DIR  = os.path.join(BASE_DIR, "out")
-OUT_EXCEL = os.path.join(OUT_DIR, r"요양심사약제_후처리_수정본.xlsx")
+OUT_EXCEL = os.path.join(OUT_DIR, "요양심사약제_후처리_수정본.xlsx")
 OUT_LOG   = os.path.join(OUT_DIR, "error_corrections.csv")
 OUT_SUMMARY = os.path.join(OUT_DIR, "summary_report.md")
 
-# g→㎍ 의심값 상한(도메인 조정 가능)
-GRAM_SUSPECT_THRESHOLD = 100.0
-
-# 제형 힌트(있으면 g→㎍ 교정 신뢰도↑)
-FORM_KEYWORDS = [
-    "정","주","주사","시럽","이식제","캡슐","패치","외용제","점안액","연고",
-    "겔","로션","현탁","현탁액","흡입","분무","스프레이","장용","서방","좌제","과립","산제","분말","점비"
-]
-
-# g 단위를 실험실 수치/검사값 맥락으로 판단하는 부정 키워드/패턴(있으면 교정 금지)
-LAB_NEG_PATTERNS = [
-    r"g\/dl", r"g\/l", r"g\/24h", r"g\/day", r"g\/g", r"g\/m2", r"g\/m²",
-    r"\bhb\b", r"\bhct\b", "헤모글로빈", "혈장", "단백뇨", "경구당부하"
-]
+# 규칙: rules/pharmalex_rules.toml 의 [normalize]
+#  - gram_suspect_threshold : g→㎍ 의심값 상한(도메인 조정 가능)
+#  - form_keywords          : 제형 힌트(있으면 g→㎍ 교정 신뢰도↑)
+#  - lab_neg_patterns       : 실험실 수치/검사값 맥락 부정 패턴(있으면 교정 금지)
+RULES = load_rule_pack()["normalize"]
+GRAM_SUSPECT_THRESHOLD = RULES["gram_suspect_threshold"]
+FORM_KEYWORDS = RULES["form_keywords"]
+LAB_NEG_PATTERNS = RULES["lab_neg_patterns"]
+FORM_RE = RULES["form_re"]   # FORM_KEYWORDS 단일 스캔 매처
+LAB_RE = RULES["lab_re"]     # LAB_NEG_PATTERNS 단일 스캔 매처 (IGNORECASE)
 
 # ===================== 유틸 함수 =====================
 
 def safe_lower(s: str) -> str:
     return s.lower() if isinstance(s, str) else s
 
-def contains_any(text: str, keywords) -> bool:
-    t = text if isinstance(text, str) else str(text)
-    return any(k in t for k in keywords)
-
-def regex_any(text: str, patterns) -> bool:
-    t = text if isinstance(text, str) else str(text)
-    return any(re.search(pat, t, flags=re.IGNORECASE) for pat in patterns)
-
 def load_ocr_anomalies(csv_path: str) -> pd.DataFrame:
     if not os.path.exists(csv_path):
         print(f"[경고] OCR 스캔 CSV가 없습니다: {csv_path}  (룰 기반만 동작)")
@@ -73,85 +67,25 @@ def load_ocr_anomalies(csv_path: str) -> pd.DataFrame:
             df[col] = ""
     return df
 
-def build_ascii_micro_regex():
-    # 예: "20mcg", "5 ug", "0.7UG" -> "숫자 + (mcg|ug)"
-    return re.compile(r"\b(\d+(?:\.\d+)?)\s*(mcg|ug)\b", flags=re.IGNORECASE)
-
-ASCII_MICRO_RE = build_ascii_micro_regex()
-G_VALUE_RE = re.compile(r"(\d+(?:\.\d+)?)\s*g(?![a-zA-Z])")  # 숫자 + g(뒤에 영문 없음)
+UNITS_ENGINE = RULES["units_engine"]   # ascii_micro + g_value 단일 스캔 (unit_normalizer)
+PREFILTER_RE = RULES["prefilter_re"]   # 숫자+단위 글자 없는 셀은 정규화 생략
 
-def normalize_ascii_micro(cell_text: str):
-    """
-    ASCII ug/mcg → 기호 ㎍ 로 치환. (안전)
-    반환: (변경여부, 변경후문자열, [로그리스트])
-    """
-    logs = []
-    def repl(m):
-        val = m.group(1)
-        unit = m.group(2)
-        before = m.group(0)
-        after = f"{val} ㎍"
-        logs.append({
-            "rule": "ascii_micro",
-            "before": before,
-            "after": after,
-            "detail": f"{unit} -> ㎍"
-        })
-        return after
-
-    new_text, n = ASCII_MICRO_RE.subn(repl, cell_text)
-    return (n > 0, new_text, logs)
-
-def should_convert_g_to_micro(cell_text: str, g_value: float) -> (bool, str):
+def should_convert_g_to_micro(cell_text: str, g_value: float, context_flags=None) -> (bool, str):
     """
     g → ㎍ 치환을 해도 되는지 판단.
     - 값이 작음(<=GRAM_SUSPECT_THRESHOLD)
     - 제형 키워드가 있음
     - 검사/실험실 맥락 부정 패턴이 없음
+    context_flags: 셀 단위로 미리 계산한 (has_form, has_lab) — 없으면 여기서 계산
     """
-    s = safe_lower(cell_text)
-    has_form = contains_any(s, [k for k in FORM_KEYWORDS])  # 한글 키워드는 소문자 처리 영향 없음
-    has_lab = regex_any(s, LAB_NEG_PATTERNS)
+    if context_flags is None:
+        # 한글 키워드는 소문자 처리 영향 없음
+        context_flags = classify_context(safe_lower(cell_text), FORM_RE, LAB_RE)
+    has_form, has_lab = context_flags
     if g_value <= GRAM_SUSPECT_THRESHOLD and has_form and not has_lab:
         return True, "value<=threshold & has_form & no_lab"
     return False, f"value={g_value}, form={has_form}, lab={has_lab}"
 
-def normalize_g_to_micro(cell_text: str):
-    """
-    '숫자 g' → 조건부 '숫자 ㎍'
-    반환: (변경여부, 변경후문자열, [로그리스트], [검토필요로그])
-    """
-    logs, reviews = [], []
-    changed = False
-
-    def repl(m):
-        nonlocal changed
-        val = m.group(1)
-        before = m.group(0)           # 예: "3g"
-        ok, reason = should_convert_g_to_micro(cell_text, float(val))
-        if ok:
-            after = f"{val} ㎍"
-            logs.append({
-                "rule": "g_to_micro_conditional",
-                "before": before,
-                "after": after,
-                "detail": reason
-            })
-            changed = True
-            return after
-        else:
-            # 자동 미적용, 검토 목록에 올림
-            reviews.append({
-                "rule": "g_to_micro_review",
-                "before": before,
-                "suggested": f"{val} ㎍ (검토)",
-                "detail": reason
-            })
-            return before  # 교정하지 않음
-
-    new_text = G_VALUE_RE.sub(repl, cell_text)
-    return changed, new_text, logs, reviews
-
 # ===================== 핵심 처리 =====================
 
 def process_dataframe(df: pd.DataFrame, sheet_name: str, ocr_df: pd.DataFrame):
@@ -169,55 +103,52 @@ def process_dataframe(df: pd.DataFrame, sheet_name: str, ocr_df: pd.DataFrame):
     # OCR CSV가 제공하는 'match'가 있다면 참고(통계용). 교정은 룰 기반으로만.
     known_suspicious_strings = set(s for s in ocr_df["match"].astype(str).unique()) if not ocr_df.empty else set()
 
+    def classify(text):
+        # 한글 키워드는 소문자 처리 영향 없음
+        return classify_context(safe_lower(text), FORM_RE, LAB_RE)
+
     for col in text_cols:
-        for idx, val in df_out[col].items():
-            if pd.isna(val):
+        values = df_out[col]
+        values = values[values.notna()].astype(str)
+        total_cells += len(values)
+        # 사전 필터(컬럼 단위 벡터화): 숫자+단위 글자가 없는 셀은 정규식 생략
+        candidates = prefilter_mask(values, PREFILTER_RE).to_numpy()
+
+        for (idx, cell), is_candidate in zip(values.items(), candidates):
+            if not is_candidate:
                 continue
-            cell = str(val)
             orig = cell
-            total_cells += 1
-
-            cell_logs = []
-            cell_reviews = []
-
-            # 1) ASCII micro 교정
-            asc_changed, cell, asc_logs = normalize_ascii_micro(cell)
-            if asc_changed:
-                cell_logs.extend(asc_logs)
 
-            # 2) g → ㎍ 조건부
-            g_changed, cell, g_logs, g_reviews = normalize_g_to_micro(cell)
-            if g_changed:
-                cell_logs.extend(g_logs)
-            if g_reviews:
-                cell_reviews.extend(g_reviews)
+            # 1) ASCII micro 교정 + 2) g → ㎍ 조건부 (단일 스캔)
+            cell, cell_logs, cell_reviews = normalize_units(cell, UNITS_ENGINE, classify,
+                                                            should_convert_g_to_micro)
 
             # 변경 반영 / 로그 적재
             if cell != orig:
                 changed_cells += 1
                 df_out.at[idx, col] = cell
-                for lg in cell_logs:
+                for rule, before, after, detail in cell_logs:
                     corrections.append({
                         "sheet": sheet_name,
                         "row_idx": idx,
                         "column": col,
-                        "rule": lg["rule"],
-                        "before": lg["before"],
-                        "after": lg["after"],
-                        "detail": lg["detail"],
-                        "had_ocr_match": any(lg["before"] == s for s in known_suspicious_strings)
+                        "rule": rule,
+                        "before": before,
+                        "after": after,
+                        "detail": detail,
+                        "had_ocr_match": any(before == s for s in known_suspicious_strings)
                     })
 
             # 검토만 필요한 경우도 기록
-            for rv in cell_reviews:
+            for rule, before, suggested, detail in cell_reviews:
                 reviews.append({
                     "sheet": sheet_name,
                     "row_idx": idx,
                     "column": col,
-                    "rule": rv["rule"],
-                    "before": rv["before"],
-                    "suggested": rv["suggested"],
-                    "detail": rv["detail"],
+                    "rule": rule,
+                    "before": before,
+                    "suggested": suggested,
+                    "detail": detail,
                     "cell_excerpt": orig[:120]
                 })
 
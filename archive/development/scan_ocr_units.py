@@ -6,47 +6,42 @@ PDF OCR 후 단위/기호 깨짐 전수 스캔 → CSV로 내보내기
 """
 
 import re
+import os
 import csv
+import sys
+import argparse
 from pathlib import Path
-import fitz  # PyMuPDF
 import pandas as pd
 
+# 저장소 루트의 공용 모듈(pdf_text_cache 등) 사용
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from pdf_text_cache import load_pages
+from rule_pack import load_rule_pack
+from run_profile import add_profile_args, profiled
+
 # ====== 설정 ======
-PDF_PATH = r"C:\Jimin\pharmaLex_sentinel\data\요양급여의 적용기준 및방법에 관한 세부사항(약제).pdf"  # 대상 PDF 경로
-OUT_CSV  = "./out/ocr_unit_anomalies_scan.csv"
+BASE = os.environ.get("PHARMALEX_BASE", r"C:\Jimin\pharmaLex_sentinel")  # 환경변수 PHARMALEX_BASE로 변경 가능
+PDF_PATH = os.path.join(BASE, "data", "요양급여의 적용기준 및방법에 관한 세부사항(약제).pdf")  # 대상 PDF 경로
+OUT_DIR  = os.path.join(BASE, "out")
+OUT_CSV  = os.path.join(OUT_DIR, "ocr_unit_anomalies_scan.csv")
+PDF_CACHE_DIR = os.path.join(OUT_DIR, "pdf_cache")  # build_mapping_from_pdf.py와 같은 캐시 공유 (None이면 미사용)
+PDF_WORKERS = 1                    # PDF 페이지 추출 프로세스 수 (--workers)
+
+# ====== 규칙: rules/pharmalex_rules.toml 의 [ocr_scan] ======
+RULES = load_rule_pack()["ocr_scan"]
 
 # 작은 g(그램)을 ㎍(마이크로그램) 오인으로 의심할 기준값 (너무 큰 g는 진짜 g일 가능성 높음)
-GRAM_SUSPECT_THRESHOLD = 100  # 100g 이하이면 의심(도메인에 맞게 조정)
+GRAM_SUSPECT_THRESHOLD = RULES["gram_suspect_threshold"]
 
 # g가 ㎍일 확률을 더 올려주는 주변 '제형/맥락' 한국어 키워드(선택)
-FORM_HINTS = [
-    "이식제","정","캡슐","현탁","시럽","액","주","흡입","분무","패치","장용","서방","안연고","점안","현탁액",
-    "흡입제","스프레이","연고","겔","로션","시럽제","과립","산제","분말","점비","좌제","점이","주사","주사용"
-]
-
-# ====== 패턴 정의 ======
-# 수치+단위류
-PATTERNS = {
-    "micro_ascii": re.compile(r"\b(\d+(?:\.\d+)?)\s*(?:ug|mcg)\b", re.IGNORECASE),
-    "micro_symbol": re.compile(r"\b(\d+(?:\.\d+)?)\s*㎍\b"),
-    "milli_ascii": re.compile(r"\b(\d+(?:\.\d+)?)\s*mg\b", re.IGNORECASE),
-    "milli_symbol": re.compile(r"\b(\d+(?:\.\d+)?)\s*㎎\b"),
-    "gram_ascii":  re.compile(r"\b(\d+(?:\.\d+)?)\s*g\b", re.IGNORECASE),
-    "ml_ascii":    re.compile(r"\b(\d+(?:\.\d+)?)\s*ml\b", re.IGNORECASE),
-    "ml_symbol":   re.compile(r"\b(\d+(?:\.\d+)?)\s*㎖\b"),
-    "iu_ascii":    re.compile(r"\b(\d+(?:\.\d+)?)\s*iu\b", re.IGNORECASE),
-    # 그리스 문자 (정상 검출 포함)
-    "greek_letters": re.compile(r"[αβγμ]"),
-}
-
-# α/β/γ가 a/b/g로 깨졌을 가능성 (보수적 규칙: 영문자 단독 하이픈 접두 등)
-GREEK_MIS_OCR = {
-    "alpha_like": re.compile(r"\b(a-|\balpha\b)", re.IGNORECASE),
-    "beta_like":  re.compile(r"\b(b-|\bbeta\b)", re.IGNORECASE),
-    "gamma_like": re.compile(r"\b(g-|\bgamma\b)", re.IGNORECASE),
-    # μ 단독: 문맥상 단위와 붙어야 하는데 빠진 케이스(예: μ g / μ l 등에서 분리되거나, 그냥 μ만 남음)
-    "mu_alone":   re.compile(r"\bμ\b"),
-}
+FORM_HINTS = RULES["form_hints"]
+FORM_HINTS_RE = RULES["form_hints_re"]  # FORM_HINTS 단일 스캔 매처
+
+# 수치+단위류 + 그리스 문자 (정상 검출 포함)
+PATTERNS = RULES["patterns"]
+
+# α/β/γ가 a/b/g로 깨졌을 가능성 + μ 단독
+GREEK_MIS_OCR = RULES["greek_mis_ocr"]
 
 def get_context(text: str, start: int, end: int, window: int = 60) -> str:
     s = max(0, start - window)
@@ -55,7 +50,7 @@ def get_context(text: str, start: int, end: int, window: int = 60) -> str:
     return re.sub(r"\s+", " ", snippet).strip()
 
 def has_form_hint(context: str) -> bool:
-    return any(h in context for h in FORM_HINTS)
+    return FORM_HINTS_RE.search(context) is not None
 
 def classify_and_suggest(kind: str, value: str, context: str):
     """
@@ -142,14 +137,11 @@ def classify_and_suggest(kind: str, value: str, context: str):
 
     return classification, suggested, reason
 
-def scan_pdf(pdf_path: str):
-    doc = fitz.open(pdf_path)
+def scan_pdf(pdf_path: str, workers: int = 1):
+    pages = load_pages(pdf_path, cache_dir=PDF_CACHE_DIR, workers=workers)
     rows = []
 
-    for pno in range(len(doc)):
-        page = doc[pno]
-        text = page.get_text("text")
-
+    for pno, text in enumerate(pages):
         # 1) 수치+단위 패턴 모두 스캔
         for key, pat in PATTERNS.items():
             for m in pat.finditer(text):
@@ -189,8 +181,19 @@ def scan_pdf(pdf_path: str):
 
     return rows
 
-def main():
-    rows = scan_pdf(PDF_PATH)
+def add_arguments(ap):
+    ap.add_argument("--workers", type=int, default=PDF_WORKERS,
+                    help="PDF 페이지 추출 프로세스 수 (1이면 직렬)")
+    add_profile_args(ap)
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="PDF 단위/기호 깨짐 전수 스캔")
+    add_arguments(ap)
+    return ap.parse_args(argv)
+
+def run(args):
+    os.makedirs(os.path.dirname(OUT_CSV) or ".", exist_ok=True)
+    rows = scan_pdf(PDF_PATH, workers=args.workers)
     df = pd.DataFrame(rows).sort_values(["classification","page"]).reset_index(drop=True)
 
     # 우선 ‘의심’ 위주로 위로 정렬되게 가중 정렬(선택)
@@ -210,5 +213,10 @@ def main():
     df.to_csv(OUT_CSV, index=False, encoding="utf-8-sig")
     print(f"[완료] CSV 저장: {OUT_CSV} (총 {len(df)}건)")
 
+def main(argv=None):
+    args = parse_args(argv)
+    with profiled(OUT_DIR, "scan_ocr_units", args.profile, args.profile_memory, args.profile_top):
+        run(args)
+
 if __name__ == "__main__":
     main()
@@ -2,8 +2,8 @@
 import os, pandas as pd
 from collections import Counter, defaultdict
 
-BASE = r"C:\Jimin\pharmaLex_sentinel"
-IN_XLSX = os.path.join(BASE, r"data\요양심사약제_후처리.xlsx")
+BASE = os.environ.get("PHARMALEX_BASE", r"C:\Jimin\pharmaLex_sentinel")
+IN_XLSX = os.path.join(BASE, "data", "요양심사약제_후처리.xlsx")
 OUT_DIR = os.path.join(BASE, "out_scan"); os.makedirs(OUT_DIR, exist_ok=True)
 
 FREQ_CSV    = os.path.join(OUT_DIR, "unicode_freq_filtered.csv")
@@ -9,47 +9,56 @@ PharmaLex Sentinel: 원본→(Step1 클린)→(Step2 정규화) 파이프라인
 
 출력:
   out/invalid_char_report.csv              (� 전수 리포트)
-  out/요양심사약제_후처리_clean.xlsx       (1단계 클린본; mapping 있으면 생성)
+  out/요양심사약제_후처리_clean.parquet    (1단계 클린본; mapping 있으면 생성, 중간 산출물
+                                           → Parquet 묶음, pyarrow 없으면 .xlsx)
   out/요양심사약제_후처리_normalized.xlsx  (2단계 최종본)
   out/error_corrections.csv                (치환 로그)
-  out/summary_report.md                    (요약 리포트)
+  out/summary_report.md                    (요약 리포트 + 실행 지표 블록)
+  out/metrics/sentinel_pipeline-<시각>.json (실행 지표: 단계별 시간, 검사/정규화 셀 수 등 — run_metrics.py)
+  out/.fingerprints/sentinel_pipeline.pkl + out/normalize_incremental_report.csv (증분 재처리)
 """
-import os, re, json, datetime as dt
+import os, sys, json, argparse, datetime as dt
 import pandas as pd
 
+# 저장소 루트의 공용 모듈(workbook_io 등) 사용
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from workbook_io import read_workbook, write_workbook, intermediate_path
+from fffd_index import find_fffd_cells
+from rule_pack import load_rule_pack
+from keyword_matcher import classify_context
+from rule_engine import compile_literal_map, apply_literal_map_many
+from unit_normalizer import normalize_units, prefilter_mask
+from fingerprint_store import (cell_fingerprint, rules_salt, load_store, save_store,
+                               plan_incremental, build_store, write_report)
+from run_metrics import timer, count, write_metrics, summary_lines
+from run_profile import add_profile_args, profiled
+
 # ---------------- 경로 설정 ----------------
-BASE = r"C:\Jimin\pharmaLex_sentinel"
-IN_XLSX = os.path.join(BASE, r"data\요양심사약제_후처리.xlsx")         # 원본
-OCR_CSV = os.path.join(BASE, r"out\ocr_unit_anomalies_scan.csv")     # 기존 생성본
-MAPPING_CSV = os.path.join(BASE, r"data\mapping.csv")                # 선택(수동 매핑표)
+BASE = os.environ.get("PHARMALEX_BASE", r"C:\Jimin\pharmaLex_sentinel")  # 환경변수 PHARMALEX_BASE로 변경 가능
+IN_XLSX = os.path.join(BASE, "data", "요양심사약제_후처리.xlsx")         # 원본
+OCR_CSV = os.path.join(BASE, "out", "ocr_unit_anomalies_scan.csv")     # 기존 생성본
+MAPPING_CSV = os.path.join(BASE, "data", "mapping.csv")                # 선택(수동 매핑표)
 
 OUT_DIR = os.path.join(BASE, "out")
 REPORT_INVALID = os.path.join(OUT_DIR, "invalid_char_report.csv")
-CLEAN_XLSX = os.path.join(OUT_DIR, "요양심사약제_후처리_clean.xlsx")
+CLEAN_OUT  = intermediate_path(OUT_DIR, "요양심사약제_후처리_clean")  # 중간 산출물
 NORM_XLSX  = os.path.join(OUT_DIR, "요양심사약제_후처리_normalized.xlsx")
 LOG_CSV    = os.path.join(OUT_DIR, "error_corrections.csv")
 SUMMARY_MD = os.path.join(OUT_DIR, "summary_report.md")
+INCREMENTAL = True   # 지문이 같은 셀은 지난 정규화 결과 재사용 (--full이면 전부 재계산)
+FP_STORE   = os.path.join(OUT_DIR, ".fingerprints", "sentinel_pipeline.pkl")
+INC_REPORT = os.path.join(OUT_DIR, "normalize_incremental_report.csv")
 
 # ---------------- Step1: � 탐지/치환 ----------------
 def scan_invalid_chars(excel_path: str, out_report: str) -> int:
-    xls = pd.ExcelFile(excel_path)
-    rows = []
-    for sheet in xls.sheet_names:
-        df = pd.read_excel(excel_path, sheet_name=sheet, dtype=str)
-        for col in df.columns:
-            for idx, val in df[col].items():
-                if pd.isna(val): 
-                    continue
-                val = str(val)
-                if "�" in val:
-                    rows.append({
-                        "sheet": sheet,
-                        "row": idx + 2,   # 헤더 감안
-                        "column": col,
-                        "value": val,
-                        "count_in_cell": val.count("�")
-                    })
-    rep = pd.DataFrame(rows)
+    hits = find_fffd_cells(read_workbook(excel_path, copy=False))
+    rep = pd.DataFrame({
+        "sheet": hits["sheet"],
+        "row": hits["row_idx"] + 2,   # 헤더 감안
+        "column": hits["column"],
+        "value": hits["value"],
+        "count_in_cell": hits["count_in_cell"],
+    }) if len(hits) else pd.DataFrame()
     os.makedirs(os.path.dirname(out_report), exist_ok=True)
     rep.to_csv(out_report, index=False, encoding="utf-8-sig")
     return len(rep)
@@ -69,121 +78,111 @@ def load_mapping(mapping_csv: str):
     return pairs
 
 def apply_mapping_to_workbook(in_xlsx: str, out_xlsx: str, pairs: list):
-    xls = pd.ExcelFile(in_xlsx)
-    writer = pd.ExcelWriter(out_xlsx, engine="openpyxl")
-    for sheet in xls.sheet_names:
-        df = pd.read_excel(in_xlsx, sheet_name=sheet, dtype=str)
-        # 문자형 컬럼에만 치환
-        for col in df.columns:
-            if df[col].dtype == object:
-                s = df[col].astype(str)
-                for before, after in pairs:
-                    s = s.str.replace(before, after, regex=False)
-                df[col] = s
-        df.to_excel(writer, sheet_name=sheet, index=False)
-    writer.close()
+    # mapping.csv 전체를 매처 하나로 (긴 before 우선, 한 글자뿐이면 str.translate)
+    engine = compile_literal_map(pairs)
+    sheets = read_workbook(in_xlsx)
+    for sheet, df in sheets.items():
+        # 문자형 컬럼에만, 결측은 그대로 두고 한 번에 치환
+        for pos, col in enumerate(df.columns):
+            s = df.iloc[:, pos]
+            if engine is None or not (s.dtype == object or pd.api.types.is_string_dtype(s.dtype)):
+                continue
+            mask = s.notna()
+            vals = s[mask].astype(str)
+            out = s.copy()
+            out[mask] = pd.Series(apply_literal_map_many(engine, vals.tolist()), index=vals.index)
+            df.isetitem(pos, out)
+    write_workbook(out_xlsx, sheets)
 
 # ---------------- Step2: 정규화(단위/기호) ----------------
-GRAM_SUSPECT_THRESHOLD = 100.0
-FORM_KEYWORDS = [
-    "정","주","주사","시럽","이식제","캡슐","패치","외용제","점안액","연고",
-    "겔","로션","현탁","현탁액","흡입","분무","스프레이","장용","서방","좌제","과립","산제","분말","점비"
-]
-LAB_NEG_PATTERNS = [
-    r"g\/dl", r"g\/l", r"g\/24h", r"g\/day", r"g\/g", r"g\/m2", r"g\/m²",
-    r"\bhb\b", r"\bhct\b", "헤모글로빈", "혈장", "단백뇨", "경구당부하"
-]
-ASCII_MICRO_RE = re.compile(r"\b(\d+(?:\.\d+)?)\s*(mcg|ug)\b", re.IGNORECASE)
-G_VALUE_RE = re.compile(r"(\d+(?:\.\d+)?)\s*g(?![a-zA-Z])")
-
-def contains_any(text: str, keywords) -> bool:
-    t = text if isinstance(text, str) else str(text)
-    return any(k in t for k in keywords)
-
-def regex_any(text: str, patterns) -> bool:
-    t = text if isinstance(text, str) else str(text)
-    return any(re.search(p, t, flags=re.IGNORECASE) for p in patterns)
-
-def normalize_ascii_micro(cell_text: str):
-    logs = []
-    def repl(m):
-        val = m.group(1); unit = m.group(2)
-        before = m.group(0); after = f"{val} ㎍"
-        logs.append(("ascii_micro", before, after, f"{unit} -> ㎍"))
-        return after
-    new_text, n = ASCII_MICRO_RE.subn(repl, cell_text)
-    return (n > 0, new_text, logs)
-
-def should_convert_g_to_micro(context_text: str, g_value: float):
-    has_form = contains_any(context_text, FORM_KEYWORDS)
-    has_lab  = regex_any(context_text, LAB_NEG_PATTERNS)
+# 규칙: rules/pharmalex_rules.toml 의 [normalize]
+RULE_PACK = load_rule_pack()
+RULES = RULE_PACK["normalize"]
+GRAM_SUSPECT_THRESHOLD = RULES["gram_suspect_threshold"]
+FORM_KEYWORDS = RULES["form_keywords"]
+LAB_NEG_PATTERNS = RULES["lab_neg_patterns"]
+FORM_RE = RULES["form_re"]   # FORM_KEYWORDS 단일 스캔 매처
+LAB_RE = RULES["lab_re"]     # LAB_NEG_PATTERNS 단일 스캔 매처 (IGNORECASE)
+UNITS_ENGINE = RULES["units_engine"]   # ascii_micro + g_value 단일 스캔
+PREFILTER_RE = RULES["prefilter_re"]   # 숫자+단위 글자 없는 셀은 정규화 생략
+
+def should_convert_g_to_micro(context_text: str, g_value: float, context_flags=None):
+    # context_flags: 셀 단위로 미리 계산한 (has_form, has_lab)
+    if context_flags is None:
+        context_flags = classify_context(context_text, FORM_RE, LAB_RE)
+    has_form, has_lab = context_flags
     if g_value <= GRAM_SUSPECT_THRESHOLD and has_form and not has_lab:
         return True, "value<=threshold & has_form & no_lab"
     return False, f"value={g_value}, form={has_form}, lab={has_lab}"
 
-def normalize_g_to_micro(cell_text: str):
-    logs, reviews = [], []
-    changed = False
-    def repl(m):
-        nonlocal changed
-        val = m.group(1); before = m.group(0)
-        ok, reason = should_convert_g_to_micro(cell_text, float(val))
-        if ok:
-            after = f"{val} ㎍"
-            logs.append(("g_to_micro_conditional", before, after, reason))
-            changed = True
-            return after
-        else:
-            reviews.append(("g_to_micro_review", before, f"{val} ㎍ (검토)", reason))
-            return before
-    new_text = G_VALUE_RE.sub(repl, cell_text)
-    return changed, new_text, logs, reviews
+def normalize_cell(cell: str):
+    """
+    셀 하나 정규화: 1) ASCII ug/mcg → 2) g → ㎍ 조건부 (unit_normalizer 단일 스캔)
+    반환: (정규화 결과, 치환 로그 [(rule, before, after, detail)], 검토 [(rule, before, suggested, detail)])
+    """
+    return normalize_units(cell, UNITS_ENGINE,
+                           lambda t: classify_context(t, FORM_RE, LAB_RE),
+                           should_convert_g_to_micro)
 
-def normalize_workbook(in_xlsx: str, ocr_csv: str, out_xlsx: str, out_log_csv: str, out_summary_md: str):
+def normalize_workbook(in_xlsx: str, ocr_csv: str, out_xlsx: str, out_log_csv: str, out_summary_md: str,
+                       full: bool = False):
     os.makedirs(os.path.dirname(out_xlsx), exist_ok=True)
-    xls = pd.ExcelFile(in_xlsx)
-    writer = pd.ExcelWriter(out_xlsx, engine="openpyxl")
     all_logs, all_reviews = [], []
-    total_cells = changed_cells = 0
-
-    for sheet in xls.sheet_names:
-        df = pd.read_excel(in_xlsx, sheet_name=sheet, dtype=str)
-        df_out = df.copy()
-        for col in df.columns:
-            for idx, val in df[col].items():
-                if pd.isna(val): 
-                    continue
-                cell = str(val); orig = cell
-                total_cells += 1
-
-                # 1) ASCII ug/mcg
-                asc_changed, cell, asc_logs = normalize_ascii_micro(cell)
-                for rule, before, after, detail in asc_logs:
-                    all_logs.append({
-                        "sheet": sheet, "row_idx": idx, "column": col,
-                        "rule": rule, "before": before, "after": after, "detail": detail
-                    })
-
-                # 2) g → ㎍ 조건부
-                g_changed, cell, g_logs, g_reviews = normalize_g_to_micro(cell)
-                for rule, before, after, detail in g_logs:
-                    all_logs.append({
-                        "sheet": sheet, "row_idx": idx, "column": col,
-                        "rule": rule, "before": before, "after": after, "detail": detail
-                    })
-                for rule, before, suggested, detail in g_reviews:
-                    all_reviews.append({
-                        "sheet": sheet, "row_idx": idx, "column": col,
-                        "rule": rule, "before": before, "suggested": suggested,
-                        "detail": detail, "cell_excerpt": orig[:120]
-                    })
-
-                if cell != orig:
-                    changed_cells += 1
-                    df_out.at[idx, col] = cell
-
-        df_out.to_excel(writer, sheet_name=sheet, index=False)
-    writer.close()
+    changed_cells = 0
+
+    sheets = read_workbook(in_xlsx, copy=False)
+    cells, candidates = [], []
+    for sheet, df in sheets.items():
+        for pos, col in enumerate(df.columns):
+            s = df.iloc[:, pos]
+            s = s[s.notna()].astype(str)
+            # 사전 필터(컬럼 단위 벡터화): 대상이 아닌 셀은 정규식 없이 그대로
+            mask = prefilter_mask(s, PREFILTER_RE).to_numpy()
+            cells += [(sheet, idx, col, val) for idx, val in s.items()]
+            candidates += mask.tolist()
+    total_cells = len(cells)
+    count("normalize.cells_scanned", total_cells)
+    count("normalize.prefilter_passed", sum(candidates))
+
+    # 증분: (셀 값, 규칙 팩) 지문이 지난 실행과 같으면 (결과, 로그, 검토) 재사용
+    keys = [(sheet, int(idx)+2, col) for sheet, idx, col, _ in cells]
+    salt = rules_salt(RULE_PACK["pack"])
+    fps = [cell_fingerprint(cell, salt) for _, _, _, cell in cells]
+    prev = load_store(FP_STORE) if INCREMENTAL and not full else {}
+    _, reused, status = plan_incremental(prev, keys, fps)
+    count("normalize.cells_reused", len(reused))
+
+    out_sheets = {sheet: df.copy() for sheet, df in sheets.items()}
+    results = []
+    for i, (sheet, idx, col, orig) in enumerate(cells):
+        if i in reused:
+            cell, logs, reviews = reused[i]
+        elif candidates[i]:
+            count("normalize.regex_evals")   # normalize_cell = 통합 정규식 finditer 1회
+            cell, logs, reviews = normalize_cell(orig)
+        else:
+            cell, logs, reviews = orig, [], []
+        results.append((cell, logs, reviews))
+
+        for rule, before, after, detail in logs:
+            all_logs.append({
+                "sheet": sheet, "row_idx": idx, "column": col,
+                "rule": rule, "before": before, "after": after, "detail": detail
+            })
+        for rule, before, suggested, detail in reviews:
+            all_reviews.append({
+                "sheet": sheet, "row_idx": idx, "column": col,
+                "rule": rule, "before": before, "suggested": suggested,
+                "detail": detail, "cell_excerpt": orig[:120]
+            })
+
+        if cell != orig:
+            changed_cells += 1
+            out_sheets[sheet].at[idx, col] = cell
+
+    save_store(FP_STORE, build_store(keys, fps, results))
+    print("[INC]", write_report(INC_REPORT, "sentinel_pipeline", keys, fps, status, prev))
+    write_workbook(out_xlsx, out_sheets)
 
     pd.DataFrame(all_logs).to_csv(out_log_csv, index=False, encoding="utf-8-sig")
 
@@ -205,28 +204,51 @@ def normalize_workbook(in_xlsx: str, ocr_csv: str, out_xlsx: str, out_log_csv: s
         else:
             f.write("- 검토 필요 없음\n")
 
-def main():
+def add_arguments(ap):
+    ap.add_argument("--full", action="store_true",
+                    help="지난 실행 결과를 재사용하지 않고 모든 셀을 다시 정규화")
+    add_profile_args(ap)
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="PharmaLex Sentinel 클린/정규화 파이프라인")
+    add_arguments(ap)
+    return ap.parse_args(argv)
+
+def run(args):
     os.makedirs(OUT_DIR, exist_ok=True)
 
     # Step 1: invalid scan
-    cnt = scan_invalid_chars(IN_XLSX, REPORT_INVALID)
+    with timer("step1.scan_invalid_chars"):
+        cnt = scan_invalid_chars(IN_XLSX, REPORT_INVALID)
     print(f"[Step1] invalid_char_report.csv 생성 (rows={cnt}) -> {REPORT_INVALID}")
 
     # Step 1b: optional mapping
     pairs = load_mapping(MAPPING_CSV)
     if pairs:
-        apply_mapping_to_workbook(IN_XLSX, CLEAN_XLSX, pairs)
-        print(f"[Step1] mapping.csv 적용 -> {CLEAN_XLSX}")
-        step2_input = CLEAN_XLSX
+        with timer("step1.apply_mapping"):
+            apply_mapping_to_workbook(IN_XLSX, CLEAN_OUT, pairs)
+        print(f"[Step1] mapping.csv 적용 -> {CLEAN_OUT}")
+        step2_input = CLEAN_OUT
     else:
         print("[Step1] mapping.csv 없음 → 원본으로 Step2 진행")
         step2_input = IN_XLSX
 
     # Step 2: normalize
-    normalize_workbook(step2_input, OCR_CSV, NORM_XLSX, LOG_CSV, SUMMARY_MD)
+    with timer("step2.normalize_workbook"):
+        normalize_workbook(step2_input, OCR_CSV, NORM_XLSX, LOG_CSV, SUMMARY_MD, full=args.full)
     print(f"[Step2] 정규화 완료 -> {NORM_XLSX}")
     print(f"[LOG] {LOG_CSV}")
+
+    # 실행 지표: 요약 리포트 뒤에 블록으로 덧붙이고 JSON으로도 저장
+    with open(SUMMARY_MD, "a", encoding="utf-8") as f:
+        f.write("\n" + "\n".join(summary_lines()) + "\n")
     print(f"[SUMMARY] {SUMMARY_MD}")
+    print("[METRICS]", write_metrics(OUT_DIR, "sentinel_pipeline"))
+
+def main(argv=None):
+    args = parse_args(argv)
+    with profiled(OUT_DIR, "sentinel_pipeline", args.profile, args.profile_memory, args.profile_top):
+        run(args)
 
 if __name__ == "__main__":
     main()
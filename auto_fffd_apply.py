@@ -12,37 +12,54 @@ U+FFFD(�) 자동 교정기
 - 출력:
   out/요양심사약제_후처리_fffd_autofixed.xlsx
   out/fffd_autofix_log.csv  (어디를 무엇으로 왜 바꿨는지)
+  out/mapping_candidates.parsed.pkl  (후보표 파싱 캐시; CSV 해시가 바뀌면 다시 만듦)
+  out/threshold_sweep.csv   (--sweep: 기준값 격자별 precision/recall/coverage, 엑셀 미사용)
+  out/.fingerprints/auto_fffd_apply.pkl + out/fffd_autofix_incremental_report.csv (증분 재처리)
+  out/metrics/auto_fffd_apply-<시각>.json (실행 지표: 구간별 시간, 셀/휴리스틱 호출 수 — run_metrics.py)
+  --patch: 시트 전체를 다시 쓰지 않고 원본 xlsx를 열어 바뀐 셀만 고쳐 OUT_XLSX로 저장
+           (서식·열너비·다른 시트 유지; 변경 셀 수가 적을 때 권장)
+  ※ 다음 패스의 입력으로만 쓸 결과는 OUT_XLSX를 *.parquet 경로로 지정하면
+    Parquet 묶음(중간 산출물)으로 저장되고, IN_XLSX에도 그대로 지정할 수 있다.
 """
 
-import os, re, pandas as pd
+import os, re, pickle, argparse, pandas as pd
+import numpy as np
 from collections import Counter
+from workbook_io import read_workbook, write_workbook, patch_workbook, is_parquet_bundle
+from pdf_text_cache import file_sha256
+from fffd_index import find_fffd_cells
+from rule_engine import apply_rules
+from rule_pack import load_rule_pack
+from fingerprint_store import (cell_fingerprint, rules_salt, load_store, save_store,
+                               plan_incremental, build_store, write_report)
+from run_metrics import timer, count, write_metrics
+from run_profile import add_profile_args, profiled
 
-BASE = r"C:\Jimin\pharmaLex_sentinel"
-IN_CAND = os.path.join(BASE, r"out\mapping_candidates.csv")
-IN_XLSX = os.path.join(BASE, r"out\요양심사약제_후처리_fffd_autofixed.xlsx")  # 이미 처리된 파일 사용
+BASE = os.environ.get("PHARMALEX_BASE", r"C:\Jimin\pharmaLex_sentinel")  # 환경변수 PHARMALEX_BASE로 변경 가능
+IN_CAND = os.path.join(BASE, "out", "mapping_candidates.csv")
+IN_CAND_CACHE = os.path.join(BASE, "out", "mapping_candidates.parsed.pkl")  # 파싱 결과 캐시(None이면 미사용)
+IN_XLSX = os.path.join(BASE, "out", "요양심사약제_후처리_fffd_autofixed.xlsx")  # 이미 처리된 파일 사용
 OUT_DIR = os.path.join(BASE, "out")
 OUT_XLSX = os.path.join(OUT_DIR, "요양심사약제_후처리_fffd_autofixed_v2.xlsx")
 OUT_LOG  = os.path.join(OUT_DIR, "fffd_autofix_log_v2.csv")
+OUT_SWEEP = os.path.join(OUT_DIR, "threshold_sweep.csv")  # --sweep 결과
+INCREMENTAL = True   # 지문이 같은 셀은 지난 결과 재사용 (--full이면 전부 재계산)
+FP_STORE = os.path.join(OUT_DIR, ".fingerprints", "auto_fffd_apply.pkl")
+INC_REPORT = os.path.join(OUT_DIR, "fffd_autofix_incremental_report.csv")
 
 # --------- 자동 확정 기준 (형님 원하는대로 '확신만' 자동) ----------
 MIN_HITS = 3         # top 후보 최소 히트수
 MARGIN_RATIO = 2.0   # top >= ratio * second 이면 자동 확정
+# 임계값 스윕 기본 격자 (--sweep)
+SWEEP_MIN_HITS = [1, 2, 3, 5, 8, 10]
+SWEEP_MARGIN_RATIOS = [1.0, 1.5, 2.0, 3.0, 5.0]
 # ------------------------------------------------------------
 
-# 애매할 때 쓰는 문맥 규칙(보수적)
-NUM = r"(?:\d+(?:\.\d+)?)"
-HEURISTICS = [
-    # 숫자 � g  → 숫자 ㎍ g 로 많이 깨짐 (예: 700�g, 10�g)
-    (re.compile(rf"({NUM})\s*�\s*g", re.IGNORECASE), r"\1 ㎍ g"),
-    # 숫자 � m l → ㎖ (예: 5 � m l 형태로 쪼개진 케이스 방어)
-    (re.compile(rf"({NUM})\s*�\s*m\s*l", re.IGNORECASE), r"\1 ㎖"),
-    # 숫자 � l  → ㎖ (예: 5 �l)
-    (re.compile(rf"({NUM})\s*�l", re.IGNORECASE), r"\1 ㎖"),
-    # a- / b- / g- 앞의 � → α/β/γ 추정
-    (re.compile(r"\b�-?\s*blocker", re.IGNORECASE), "α-blocker"),
-    (re.compile(r"\b�-?\s*interferon", re.IGNORECASE), "α-interferon"),
-    (re.compile(r"\bpeginterferon\s+�-?1", re.IGNORECASE), "peginterferon α-1"),
-]
+# 애매할 때 쓰는 문맥 규칙(보수적) — rules/pharmalex_rules.toml 의 [[heuristics]]
+RULES = load_rule_pack()
+HEURISTICS = RULES["heuristics"]
+# 규칙 전체를 하나의 정규식으로 합친 엔진 (셀당 1회 스캔)
+HEURISTICS_ENGINE = RULES["heuristics_engine"]
 
 def parse_scores(scores_str: str):
     # "㎍:12(p459|p461) | ㎎:3(p21) | ㎖:0" → [('㎍',12), ('㎎',3), ('㎖',0)]
@@ -55,100 +72,257 @@ def parse_scores(scores_str: str):
             out.append((m.group(1).strip(), int(m.group(2))))
     return out
 
+def top_two(scores):
+    # parse_scores 결과 → (후보 수, top_total, second_total)
+    totals = sorted((t for _, t in scores), reverse=True)
+    return len(totals), (totals[0] if totals else 0), (totals[1] if len(totals) >= 2 else 0)
+
+def is_confident(n_scores, top_total, second_total, min_hits=None, margin_ratio=None):
+    """
+    자동 확정 판정. 스칼라/NumPy 배열 모두 가능 (임계값 스윕에서 배열로 사용)
+    """
+    min_hits = MIN_HITS if min_hits is None else min_hits
+    margin_ratio = MARGIN_RATIO if margin_ratio is None else margin_ratio
+    return (n_scores > 0) & (top_total >= min_hits) & ((second_total == 0) | (top_total >= margin_ratio * second_total))
+
 def confident_choice(best: str, scores_str: str):
-    scores = parse_scores(scores_str)
-    if not scores:
-        return False, ""
-    scores.sort(key=lambda x: -x[1])
-    top_cand, top_total = scores[0]
-    second_total = scores[1][1] if len(scores) >= 2 else 0
-    if top_cand != best:
-        # best_candidate는 이미 점수 기반이므로 그대로 신뢰
-        pass
-    if top_total >= MIN_HITS and (second_total == 0 or top_total >= MARGIN_RATIO * second_total):
+    # best_candidate는 이미 점수 기반이므로 그대로 신뢰
+    if is_confident(*top_two(parse_scores(scores_str))):
         return True, best
     return False, ""
 
 def apply_heuristics(text: str):
-    new = text
-    applied = []
-    for pat, repl in HEURISTICS:
-        new2, n = pat.subn(repl, new)
-        if n > 0:
-            applied.append(f"{pat.pattern} -> {repl} x{n}")
-        new = new2
-    return new, applied
+    count("heuristics.calls")
+    with timer("apply_heuristics"):
+        return apply_rules(HEURISTICS_ENGINE, text)
+
+def parse_candidate_table(df: pd.DataFrame):
+    """
+    mapping_candidates 표 → 열 단위 사전 파싱 결과
+    (candidate_scores 문자열은 여기서 한 번만 파싱하고 점수는 정수 배열로 보관)
+    """
+    n = len(df)
+    best = df["best_candidate"] if "best_candidate" in df.columns else pd.Series([""] * n)
+    scores = df["candidate_scores"] if "candidate_scores" in df.columns else pd.Series([""] * n)
+    stats = np.array([top_two(parse_scores(x)) for x in scores], dtype=np.int64).reshape(n, 3)
+    return {
+        "keys": list(zip(df["sheet"], df["row"].astype(str), df["column"])),
+        "value": df["value"].tolist(),
+        "best": best.tolist(),
+        "final_after": (df["final_after"] if "final_after" in df.columns else pd.Series([""] * n)).tolist(),
+        "n_scores": stats[:, 0],
+        "top": stats[:, 1],
+        "second": stats[:, 2],
+    }
+
+CAND_CACHE_VERSION = 2  # parse_candidate_table 구조가 바뀌면 올림
+
+def load_candidate_table(cand_csv=None, cache_path=None):
+    """
+    파싱된 후보표. cache_path가 있으면 CSV 해시가 같을 때 재파싱 없이 피클을 읽는다.
+    """
+    cand_csv = cand_csv or IN_CAND
+    cache_path = IN_CAND_CACHE if cache_path is None else cache_path
+    digest = file_sha256(cand_csv)
+    if cache_path and os.path.exists(cache_path):
+        with open(cache_path, "rb") as f:
+            cached = pickle.load(f)
+        if cached.get("sha256") == digest and cached.get("version") == CAND_CACHE_VERSION:
+            return cached["table"]
+    table = parse_candidate_table(pd.read_csv(cand_csv, dtype=str).fillna(""))
+    if cache_path:
+        # 임시 파일에 쓰고 교체 → 중간에 끊겨도 깨진 캐시가 남지 않음
+        with open(cache_path + ".tmp", "wb") as f:
+            pickle.dump({"sha256": digest, "version": CAND_CACHE_VERSION, "table": table}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(cache_path + ".tmp", cache_path)
+    return table
 
 def load_candidates():
-    df = pd.read_csv(IN_CAND, dtype=str).fillna("")
-    # (sheet,row,column) → (value, best, scores)
+    table = load_candidate_table()
+    # 현재 MIN_HITS / MARGIN_RATIO 기준 판정을 한 번에 계산
+    ok = is_confident(table["n_scores"], table["top"], table["second"])
+    # (sheet,row,column) → (value, best, 판정)
     rows = {}
-    for _, r in df.iterrows():
-        key = (r["sheet"], str(r["row"]), r["column"])
+    for i, key in enumerate(table["keys"]):
+        best = table["best"][i]
         rows[key] = {
-            "value": r["value"],
-            "best": r.get("best_candidate",""),
-            "scores": r.get("candidate_scores","")
+            "value": table["value"][i],
+            "best": best,
+            "ok": bool(ok[i]),
+            "choice": best if ok[i] else ""
         }
     return rows
 
-def main():
+def cand_decision(cand: dict, key):
+    # 후보표 기반 자동 확정 판정 (ok, choice) — 후보표에 없으면 (False, "")
+    if key in cand:
+        return cand[key]["ok"], cand[key]["choice"]
+    return False, ""
+
+def fix_cell(s0: str, decision):
+    """
+    � 셀 하나 교정 → (교정 결과, 적용 사유)
+    """
+    s = s0
+    applied_reason = ""
+
+    # 1) mapping_candidates 기반 자동 확정 시도
+    ok, choice = decision
+    if ok and choice:
+        s = s.replace("�", choice)
+        applied_reason = f"auto-best:{choice}"
+
+    # 2) 점수 애매했거나 후보표에 없으면 문맥 휴리스틱
+    if "�" in s:
+        s_heur, heur_applied = apply_heuristics(s)
+        if s_heur != s:
+            s = s_heur
+            if applied_reason:
+                applied_reason += " + heuristics"
+            else:
+                applied_reason = "heuristics"
+
+    # 3) 그래도 남아있으면 최후의 안전장치(치환 안 함)
+    return s, applied_reason
+
+def sweep_thresholds(table, min_hits_grid=None, ratio_grid=None):
+    """
+    (MIN_HITS, MARGIN_RATIO) 격자별 자동 확정 성능을 한 번에 계산 (엑셀 읽기/쓰기 없음)
+    - 정답: final_after (교체 문자 하나 또는 교정된 셀 전체 문자열 모두 허용)
+    - coverage  = 자동 확정 셀 / 전체 후보표 셀
+    - precision = 정답 있는 자동 확정 중 맞춘 비율
+    - recall    = 정답 있는 셀 중 자동 확정으로 맞춘 비율
+    """
+    min_hits_grid = SWEEP_MIN_HITS if min_hits_grid is None else min_hits_grid
+    ratio_grid = SWEEP_MARGIN_RATIOS if ratio_grid is None else ratio_grid
+    best = np.array(table["best"], dtype=object)
+    truth = np.array([str(x).strip() for x in table["final_after"]], dtype=object)
+    fixed = np.array([v.replace("�", b) for v, b in zip(table["value"], table["best"])], dtype=object)
+    labeled = truth != ""
+    has_choice = best != ""
+    correct = labeled & has_choice & ((best == truth) | (fixed == truth))
+
+    mh = np.array(min_hits_grid, dtype=float)[:, None, None]
+    mr = np.array(ratio_grid, dtype=float)[None, :, None]
+    # 격자 × 셀 판정 행렬 (브로드캐스팅)
+    auto = is_confident(table["n_scores"], table["top"], table["second"], mh, mr) & has_choice
+
+    n_total, n_labeled = len(best), int(labeled.sum())
+    rows = []
+    for i, min_hits in enumerate(min_hits_grid):
+        for j, ratio in enumerate(ratio_grid):
+            a = auto[i, j]
+            n_auto = int(a.sum())
+            n_auto_labeled = int((a & labeled).sum())
+            n_correct = int((a & correct).sum())
+            rows.append({
+                "min_hits": min_hits,
+                "margin_ratio": ratio,
+                "auto_fixed": n_auto,
+                "coverage": n_auto / n_total if n_total else 0.0,
+                "labeled_auto": n_auto_labeled,
+                "correct": n_correct,
+                "precision": n_correct / n_auto_labeled if n_auto_labeled else float("nan"),
+                "recall": n_correct / n_labeled if n_labeled else float("nan"),
+            })
+    return pd.DataFrame(rows)
+
+def parse_grid(text, cast):
+    return [cast(x) for x in text.split(",") if x.strip()]
+
+def add_arguments(ap):
+    ap.add_argument("--sweep", action="store_true",
+                    help="엑셀은 건드리지 않고 MIN_HITS/MARGIN_RATIO 격자 성능만 계산")
+    ap.add_argument("--min-hits", type=lambda t: parse_grid(t, int), default=SWEEP_MIN_HITS,
+                    help="스윕할 MIN_HITS 목록 (예: 1,2,3,5)")
+    ap.add_argument("--ratios", type=lambda t: parse_grid(t, float), default=SWEEP_MARGIN_RATIOS,
+                    help="스윕할 MARGIN_RATIO 목록 (예: 1.5,2,3)")
+    ap.add_argument("--full", action="store_true",
+                    help="지난 실행 결과를 재사용하지 않고 모든 셀을 다시 계산")
+    ap.add_argument("--patch", action="store_true",
+                    help="원본 xlsx의 바뀐 셀만 고쳐 저장 (서식 유지, pandas 재직렬화 없음)")
+    add_profile_args(ap)
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="U+FFFD(�) 자동 교정기")
+    add_arguments(ap)
+    return ap.parse_args(argv)
+
+def run_sweep(min_hits_grid, ratio_grid):
+    table = load_candidate_table()
+    res = sweep_thresholds(table, min_hits_grid, ratio_grid)
+    res.to_csv(OUT_SWEEP, index=False, encoding="utf-8-sig")
+    print(res.to_string(index=False))
+    print("[OK] 스윕 결과:", OUT_SWEEP)
+    return res
+
+def run(args):
     os.makedirs(OUT_DIR, exist_ok=True)
+    if args.sweep:
+        run_sweep(args.min_hits, args.ratios)
+        return
     cand = load_candidates()
 
-    xls = pd.ExcelFile(IN_XLSX)
-    writer = pd.ExcelWriter(OUT_XLSX, engine="openpyxl")
+    sheets = read_workbook(IN_XLSX)
     logs = []
 
-    for sheet in xls.sheet_names:
-        df = pd.read_excel(IN_XLSX, sheet_name=sheet, dtype=str)
-        for r in range(len(df)):
-            for c, col in enumerate(df.columns):
-                val = df.iat[r, c]
-                if pd.isna(val) or "�" not in str(val):
-                    continue
-                s0 = str(val)
-                s = s0
-
-                # 1) mapping_candidates 기반 자동 확정 시도
-                key = (sheet, str(r+2), col)  # 엑셀 표시행 기준(row+2)
-                applied_reason = ""
-
-                if key in cand:
-                    ok, choice = confident_choice(cand[key]["best"], cand[key]["scores"])
-                    if ok and choice:
-                        s = s.replace("�", choice)
-                        applied_reason = f"auto-best:{choice}"
-                
-                # 2) 점수 애매했거나 후보표에 없으면 문맥 휴리스틱
-                if "�" in s:
-                    s_heur, heur_applied = apply_heuristics(s)
-                    if s_heur != s:
-                        s = s_heur
-                        if applied_reason:
-                            applied_reason += " + heuristics"
-                        else:
-                            applied_reason = "heuristics"
-
-                # 3) 그래도 남아있으면 최후의 안전장치(치환 안 함)
-                if s != s0:
-                    df.iat[r, c] = s
-                    logs.append({
-                        "sheet": sheet,
-                        "row": r+2,
-                        "column": col,
-                        "before": s0,
-                        "after": s,
-                        "reason": applied_reason if applied_reason else "n/a"
-                    })
-
-        df.to_excel(writer, sheet_name=sheet, index=False)
-    writer.close()
+    # � 셀 색인(컬럼 단위 벡터화) → 기존 행 우선 순회 순서로 정렬
+    with timer("find_fffd_cells"):
+        hits = find_fffd_cells(sheets).sort_values(["sheet_pos", "row_idx", "col_pos"], kind="stable")
+    items = list(hits[["sheet", "row_idx", "col_pos", "column", "value"]].itertuples(index=False, name=None))
+    count("fffd_cells", len(items))
+
+    # 증분: (값, 후보표 판정, 규칙 팩) 지문이 지난 실행과 같으면 결과 재사용
+    keys = [(sheet, int(r)+2, col) for sheet, r, c, col, s0 in items]  # 엑셀 표시행 기준(row+2)
+    decisions = [cand_decision(cand, (sheet, str(r+2), col)) for sheet, r, c, col, s0 in items]
+    salt = rules_salt(RULES["pack"])
+    fps = [cell_fingerprint(s0, (salt, d)) for (_, _, _, _, s0), d in zip(items, decisions)]
+    prev = load_store(FP_STORE) if INCREMENTAL and not args.full else {}
+    _, reused, status = plan_incremental(prev, keys, fps)
+
+    count("cells_reused", len(reused))
+    results, patches = [], []
+    for i, (sheet, r, c, col, s0) in enumerate(items):
+        s, applied_reason = reused[i] if i in reused else fix_cell(s0, decisions[i])
+        results.append((s, applied_reason))
+
+        if s != s0:
+            sheets[sheet].iat[r, c] = s
+            patches.append((sheet, r+2, c, s, s0))
+            logs.append({
+                "sheet": sheet,
+                "row": r+2,
+                "column": col,
+                "before": s0,
+                "after": s,
+                "reason": applied_reason if applied_reason else "n/a"
+            })
+
+    save_store(FP_STORE, build_store(keys, fps, results))
+    print("[INC]", write_report(INC_REPORT, "auto_fffd_apply", keys, fps, status, prev))
+
+    can_patch = not is_parquet_bundle(IN_XLSX) and not is_parquet_bundle(OUT_XLSX)
+    if args.patch and not can_patch:
+        print("[WARN] --patch는 xlsx 입출력에만 가능 → 전체 저장으로 진행")
+    if args.patch and can_patch:
+        applied, skipped = patch_workbook(IN_XLSX, OUT_XLSX, patches)
+        print(f"[PATCH] 원본 셀 직접 수정: {applied}개 적용, {len(skipped)}개 건너뜀")
+        for patch, why in skipped:
+            print("   -", why, patch[:3])
+    else:
+        write_workbook(OUT_XLSX, sheets)
 
     pd.DataFrame(logs).to_csv(OUT_LOG, index=False, encoding="utf-8-sig")
     print("[OK] 엑셀 저장:", OUT_XLSX)
     print("[OK] 로그 저장 :", OUT_LOG)
     print(f"[INFO] 총 변경 셀 수: {len(logs)}")
+    count("cells_changed", len(logs))
+    print("[METRICS]", write_metrics(OUT_DIR, "auto_fffd_apply"))
+
+def main(argv=None):
+    args = parse_args(argv)
+    with profiled(OUT_DIR, "auto_fffd_apply", args.profile, args.profile_memory, args.profile_top):
+        run(args)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,244 @@
+# -*- coding: utf-8 -*-
+"""
+파이프라인 벤치마크 — 합성 데이터(synthetic_data.py)로 단계별/전체 실행 시간 측정
+
+대상:
+  build_mapping_from_pdf  : � 셀 스캔 / PDF 텍스트 추출(캐시 없음) / n-gram 색인 / 후보 점수 / main(cold, warm)
+  auto_fffd_apply         : 후보표 파싱 / 엑셀 로딩 / main(전체 저장, --patch)
+  sentinel_pipeline       : � 리포트 / mapping 적용 / 정규화 / main
+  scan_ocr_units          : scan_pdf(캐시 없음) / main
+  · 각 스크립트는 평소처럼 모듈 상수(경로)를 바꿔 끼워 실행 — 출력은 전부 --out 아래
+  · cold = 캐시/지문/메모를 지우고 실행, warm = 직전 실행 산출물(캐시) 그대로 재실행
+  · --repeat N 이면 N번 중 최소 시간
+
+출력:
+  <out>/results.json, <out>/results.csv   (단계별 초 + 데이터 규모/환경)
+  --baseline <results.json> 을 주면 단계별 비율을 표시하고, 허용치(--tolerance)보다 느려진
+  단계가 있으면 종료 코드 1 (회귀 감지용)
+
+사용:
+  python benchmarks/run_benchmarks.py --rows 5000 --density 0.05 --pages 200
+  python benchmarks/run_benchmarks.py --rows 5000 --baseline out/bench/results_prev.json
+"""
+
+import os, sys, json, time, shutil, platform, argparse, importlib.util
+import datetime as dt
+import pandas as pd
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import synthetic_data
+import workbook_io
+import pdf_text_cache
+import build_mapping_from_pdf
+import auto_fffd_apply
+
+STAGE_GROUPS = ["build_mapping", "auto_fffd_apply", "sentinel_pipeline", "scan_ocr_units"]
+
+def load_script(name, rel_path):
+    # archive/ 스크립트는 패키지가 아니므로 파일 경로로 로드
+    spec = importlib.util.spec_from_file_location(name, os.path.join(ROOT, rel_path))
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
+
+def reset_dir(path):
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path, exist_ok=True)
+
+def timed(results, stage, fn, repeat=1, setup=None):
+    """fn을 repeat번 실행해 최소 시간 기록 (setup은 매 회 측정 전에 실행, 시간 제외)"""
+    best, value = None, None
+    for _ in range(repeat):
+        if setup:
+            setup()
+        # 프로세스 안 재사용(엑셀 파싱·PDF 페이지)은 매 회 비움 → 스크립트를 따로 실행한 것과 같은 조건
+        workbook_io.clear_workbook_cache()
+        pdf_text_cache.clear_pages_cache()
+        t0 = time.perf_counter()
+        value = fn()
+        sec = time.perf_counter() - t0
+        best = sec if best is None else min(best, sec)
+    results.append({"stage": stage, "seconds": round(best, 4), "repeat": repeat})
+    print(f"  {stage:<44} {best:9.3f}s")
+    return value
+
+def bench_build_mapping(results, data, out, repeat, quiet):
+    b = build_mapping_from_pdf
+    work = os.path.join(out, "build_mapping")
+    reset_dir(work)
+    b.IN_XLSX, b.IN_PDF, b.OUT_DIR = data["xlsx"], data["pdf"], work
+    b.CAND_CSV = os.path.join(work, "mapping_candidates.csv")
+    b.PDF_CACHE_DIR = os.path.join(work, "pdf_cache")
+    b.FP_STORE = os.path.join(work, ".fingerprints", "build_mapping.pkl")
+    b.INC_REPORT = os.path.join(work, "mapping_incremental_report.csv")
+    b.CONTEXT_MEMO = os.path.join(work, ".memo", "context_scores.pkl")
+
+    def clear_caches():
+        for d in ("pdf_cache", ".fingerprints", ".memo"):
+            shutil.rmtree(os.path.join(work, d), ignore_errors=True)
+
+    cells = timed(results, "build_mapping.scan_fffd_cells", lambda: list(b.iter_fffd_cells(b.IN_XLSX)), repeat)
+    cache_dir = b.PDF_CACHE_DIR
+    b.PDF_CACHE_DIR = None
+    pages = timed(results, "build_mapping.load_pdf_text(no cache)", lambda: b.load_pdf_text_by_page(b.IN_PDF), repeat)
+    b.PDF_CACHE_DIR = cache_dir
+    index = timed(results, "build_mapping.build_ngram_index", lambda: b.build_ngram_index(pages), repeat)
+    timed(results, "build_mapping.score_cells(no memo)",
+          lambda: b.score_cells(pages, index, [c[3] for c in cells]), repeat)
+    timed(results, "build_mapping.main(cold)", lambda: run_quiet(b.main, [], quiet), repeat, setup=clear_caches)
+    timed(results, "build_mapping.main(warm)", lambda: run_quiet(b.main, [], quiet), repeat)
+    return b.CAND_CSV
+
+def bench_auto_fffd_apply(results, data, out, cand_csv, repeat, quiet):
+    a = auto_fffd_apply
+    work = os.path.join(out, "auto_fffd_apply")
+    reset_dir(work)
+    a.IN_CAND, a.IN_XLSX, a.OUT_DIR = cand_csv, data["xlsx"], work
+    a.IN_CAND_CACHE = os.path.join(work, "mapping_candidates.parsed.pkl")
+    a.OUT_XLSX = os.path.join(work, "autofixed.xlsx")
+    a.OUT_LOG = os.path.join(work, "fffd_autofix_log.csv")
+    a.OUT_SWEEP = os.path.join(work, "threshold_sweep.csv")
+    a.FP_STORE = os.path.join(work, ".fingerprints", "auto_fffd_apply.pkl")
+    a.INC_REPORT = os.path.join(work, "fffd_autofix_incremental_report.csv")
+
+    def clear_cand_cache():
+        if os.path.exists(a.IN_CAND_CACHE):
+            os.remove(a.IN_CAND_CACHE)
+
+    timed(results, "auto_fffd_apply.parse_candidates(cold)", a.load_candidates, repeat, setup=clear_cand_cache)
+    timed(results, "auto_fffd_apply.read_workbook", lambda: workbook_io.read_workbook(a.IN_XLSX), repeat)
+    timed(results, "auto_fffd_apply.main(full write)", lambda: run_quiet(a.main, ["--full"], quiet), repeat)
+    timed(results, "auto_fffd_apply.main(--patch)", lambda: run_quiet(a.main, ["--full", "--patch"], quiet), repeat)
+
+def bench_scan_ocr_units(results, data, out, repeat, quiet):
+    o = load_script("bench_scan_ocr_units", os.path.join("archive", "development", "scan_ocr_units.py"))
+    work = os.path.join(out, "scan_ocr_units")
+    reset_dir(work)
+    o.PDF_PATH = data["pdf"]
+    o.OUT_CSV = os.path.join(work, "ocr_unit_anomalies_scan.csv")
+    o.PDF_CACHE_DIR = None
+    timed(results, "scan_ocr_units.scan_pdf(no cache)", lambda: o.scan_pdf(o.PDF_PATH), repeat)
+    timed(results, "scan_ocr_units.main", lambda: run_quiet(o.main, [], quiet), repeat)
+    return o.OUT_CSV
+
+def bench_sentinel_pipeline(results, data, out, ocr_csv, repeat, quiet):
+    p = load_script("bench_sentinel_pipeline", os.path.join("archive", "development", "sentinel_pipeline.py"))
+    work = os.path.join(out, "sentinel_pipeline")
+    reset_dir(work)
+    p.IN_XLSX, p.OCR_CSV, p.MAPPING_CSV, p.OUT_DIR = data["xlsx"], ocr_csv, data["mapping"], work
+    p.REPORT_INVALID = os.path.join(work, "invalid_char_report.csv")
+    p.CLEAN_OUT = workbook_io.intermediate_path(work, "clean")
+    p.NORM_XLSX = os.path.join(work, "normalized.xlsx")
+    p.LOG_CSV = os.path.join(work, "error_corrections.csv")
+    p.SUMMARY_MD = os.path.join(work, "summary_report.md")
+    p.FP_STORE = os.path.join(work, ".fingerprints", "sentinel_pipeline.pkl")
+    p.INC_REPORT = os.path.join(work, "normalize_incremental_report.csv")
+
+    timed(results, "sentinel_pipeline.scan_invalid_chars",
+          lambda: p.scan_invalid_chars(p.IN_XLSX, p.REPORT_INVALID), repeat)
+    pairs = p.load_mapping(p.MAPPING_CSV)
+    timed(results, "sentinel_pipeline.apply_mapping",
+          lambda: p.apply_mapping_to_workbook(p.IN_XLSX, p.CLEAN_OUT, pairs), repeat)
+    timed(results, "sentinel_pipeline.normalize_workbook(full)",
+          lambda: run_quiet(p.normalize_workbook, None, quiet, p.CLEAN_OUT, p.OCR_CSV, p.NORM_XLSX,
+                            p.LOG_CSV, p.SUMMARY_MD, full=True), repeat)
+    timed(results, "sentinel_pipeline.main(full)", lambda: run_quiet(p.main, ["--full"], quiet), repeat)
+
+def run_quiet(fn, argv, quiet, *args, **kwargs):
+    # 각 스크립트의 진행 로그 출력 억제 (--verbose면 그대로)
+    call = (lambda: fn(argv)) if argv is not None else (lambda: fn(*args, **kwargs))
+    if not quiet:
+        return call()
+    import contextlib, io
+    with contextlib.redirect_stdout(io.StringIO()):
+        return call()
+
+def load_baseline(baseline_path):
+    with open(baseline_path, encoding="utf-8") as f:
+        return {r["stage"]: r["seconds"] for r in json.load(f)["results"]}
+
+def compare_with_baseline(results, base, baseline_path, tolerance):
+    regressions = []
+    print(f"\n[비교] 기준: {baseline_path} (허용 +{tolerance:.0%})")
+    for r in results:
+        if r["stage"] not in base or base[r["stage"]] <= 0:
+            continue
+        ratio = r["seconds"] / base[r["stage"]]
+        flag = "  ← 회귀" if ratio > 1 + tolerance else ""
+        print(f"  {r['stage']:<44} {base[r['stage']]:9.3f}s → {r['seconds']:9.3f}s  x{ratio:.2f}{flag}")
+        if flag:
+            regressions.append(r["stage"])
+    return regressions
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="PharmaLex Sentinel 파이프라인 벤치마크 (합성 데이터)")
+    ap.add_argument("--rows", type=int, default=2000)
+    ap.add_argument("--extra-cols", type=int, default=0, help="비고 컬럼 추가 수")
+    ap.add_argument("--density", type=float, default=0.05, help="텍스트 셀 중 � 비율")
+    ap.add_argument("--pages", type=int, default=100, help="합성 PDF 최소 페이지 수")
+    ap.add_argument("--mapping-pairs", type=int, default=200)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--repeat", type=int, default=1, help="단계별 반복 횟수 (최소 시간 기록)")
+    ap.add_argument("--stages", default=",".join(STAGE_GROUPS),
+                    help=f"측정할 단계 묶음 (기본 전체: {','.join(STAGE_GROUPS)})")
+    ap.add_argument("--out", default=os.path.join("out", "bench"))
+    ap.add_argument("--baseline", help="비교할 이전 results.json")
+    ap.add_argument("--tolerance", type=float, default=0.25, help="회귀로 볼 느려짐 비율 (0.25 = 25%%)")
+    ap.add_argument("--verbose", action="store_true", help="각 스크립트 진행 로그 표시")
+    return ap.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    stages = [s.strip() for s in args.stages.split(",") if s.strip()]
+    unknown = set(stages) - set(STAGE_GROUPS)
+    if unknown:
+        raise SystemExit(f"알 수 없는 단계: {sorted(unknown)}")
+    out = os.path.abspath(args.out)
+    os.makedirs(out, exist_ok=True)
+    quiet = not args.verbose
+    # 기준 파일이 이번 출력(results.json)과 같아도 되도록 먼저 읽어 둠
+    base = load_baseline(args.baseline) if args.baseline else None
+
+    print(f"[데이터] rows={args.rows} extra_cols={args.extra_cols} density={args.density} pages>={args.pages}")
+    t0 = time.perf_counter()
+    data = synthetic_data.generate(os.path.join(out, "data"), args.rows, args.extra_cols, args.density,
+                                   args.pages, args.mapping_pairs, args.seed)
+    print(f"  생성 {time.perf_counter() - t0:.1f}s — � 셀 {data['fffd_cells']}, PDF {data['pages']}쪽")
+
+    results = []
+    cand_csv, ocr_csv = None, None
+    if "build_mapping" in stages or "auto_fffd_apply" in stages:
+        print("[build_mapping_from_pdf]")
+        cand_csv = bench_build_mapping(results, data, out, args.repeat, quiet)
+    if "auto_fffd_apply" in stages:
+        print("[auto_fffd_apply]")
+        bench_auto_fffd_apply(results, data, out, cand_csv, args.repeat, quiet)
+    if "scan_ocr_units" in stages or "sentinel_pipeline" in stages:
+        print("[scan_ocr_units]")
+        ocr_csv = bench_scan_ocr_units(results, data, out, args.repeat, quiet)
+    if "sentinel_pipeline" in stages:
+        print("[sentinel_pipeline]")
+        bench_sentinel_pipeline(results, data, out, ocr_csv, args.repeat, quiet)
+
+    meta = {
+        "timestamp": dt.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "python": platform.python_version(), "pandas": pd.__version__, "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "data": {k: data[k] for k in ("rows", "cols", "fffd_cells", "pages")},
+        "params": vars(args),
+    }
+    with open(os.path.join(out, "results.json"), "w", encoding="utf-8") as f:
+        json.dump({"meta": meta, "results": results}, f, ensure_ascii=False, indent=2)
+    pd.DataFrame(results).to_csv(os.path.join(out, "results.csv"), index=False, encoding="utf-8-sig")
+    print(f"\n[저장] {os.path.join(out, 'results.json')}")
+
+    if args.baseline:
+        regressions = compare_with_baseline(results, base, args.baseline, args.tolerance)
+        if regressions:
+            print(f"[회귀] {len(regressions)}개 단계가 허용치보다 느려짐")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""
+pharmalex.py 명령 전체 스모크 실행 — 합성 데이터(synthetic_data.py)로 모든 하위 명령을 한 번씩 실행
+
+- 명령마다 별도 프로세스(python pharmalex.py <명령> ...)로 실행 → 사용자가 치는 것과 같은 경로
+- 실행 순서: scan, build-mapping, autofix, ocr-scan, normalize, run-all, run-all(재실행: 전부 건너뜀)
+- 실패한 명령이 있으면 마지막 출력 일부를 보여 주고 종료 코드 1
+
+사용:
+  python benchmarks/smoke_cli.py
+  python benchmarks/smoke_cli.py --rows 500 --out out/smoke --verbose
+"""
+
+import os, sys, time, shutil, argparse, subprocess
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import synthetic_data
+
+COMMANDS = [
+    ["scan"],
+    ["build-mapping"],
+    ["autofix"],
+    ["ocr-scan"],
+    ["normalize"],
+    ["run-all", "--jobs", "2"],
+    ["run-all", "--jobs", "2"],
+]
+
+def run_command(argv, data, out, verbose):
+    cmd = [sys.executable, os.path.join(ROOT, "pharmalex.py")] + argv
+    cmd += ["--xlsx", data["xlsx"], "--pdf", data["pdf"], "--mapping", data["mapping"], "--out", out]
+    t0 = time.perf_counter()
+    proc = subprocess.run(cmd, cwd=ROOT, capture_output=True, text=True, encoding="utf-8", errors="replace")
+    sec = time.perf_counter() - t0
+    if verbose:
+        print(proc.stdout + proc.stderr)
+    return proc, sec
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="pharmalex.py 하위 명령 스모크 실행 (합성 데이터)")
+    ap.add_argument("--rows", type=int, default=200)
+    ap.add_argument("--pages", type=int, default=5, help="합성 PDF 최소 페이지 수")
+    ap.add_argument("--out", default=os.path.join("out", "smoke"))
+    ap.add_argument("--verbose", action="store_true", help="각 명령 출력 표시")
+    return ap.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    out = os.path.abspath(args.out)
+    shutil.rmtree(out, ignore_errors=True)
+    data = synthetic_data.generate(os.path.join(out, "data"), args.rows, pages=args.pages)
+    work = os.path.join(out, "run")
+
+    failed = []
+    for argv_ in COMMANDS:
+        proc, sec = run_command(argv_, data, work, args.verbose)
+        label = " ".join(argv_)
+        ok = proc.returncode == 0
+        print(f"  {label:<24} {'OK ' if ok else 'FAIL'} {sec:7.1f}s")
+        if not ok:
+            failed.append(label)
+            tail = (proc.stdout + proc.stderr).strip().splitlines()[-15:]
+            print("    " + "\n    ".join(tail))
+    if failed:
+        print(f"[스모크] 실패 {len(failed)}개: {', '.join(failed)}")
+        sys.exit(1)
+    print(f"[스모크] {len(COMMANDS)}개 명령 모두 통과")
+
+if __name__ == "__main__":
+    main()
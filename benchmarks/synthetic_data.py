@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+"""
+벤치마크용 합성 데이터 생성기 (run_benchmarks.py에서 사용, 단독 실행도 가능)
+
+- make_rows: 요양심사약제 스타일 행 (약제분류번호 / 약제분류명 / 구분 / 세부인정기준 및 방법 + 비고 컬럼)
+  · 원문(정답)과 �로 깨진 셀 두 벌을 만든다 — 단위/그리스 문자(㎍ ㎎ ㎖ α β γ μ · × ~ - /) 일부를 �로
+  · density: 특수문자가 있는 텍스트 셀 중 �로 깨뜨릴 비율
+- write_workbook_xlsx: 깨진 셀 버전을 엑셀로 (workbook_io.write_workbook)
+- write_reference_pdf: 원문 버전을 PyMuPDF로 여러 페이지 PDF에 흘려 씀 (+ 채움 문단으로 최소 페이지 수 보장)
+  · 한글/그리스 문자/㎍ 글리프는 PyMuPDF 내장 'korea' 폰트 사용
+- write_mapping_csv: sentinel_pipeline용 mapping.csv (� → ㎍ + 임의 리터럴 쌍)
+
+사용:
+  python benchmarks/synthetic_data.py --rows 5000 --density 0.05 --pages 200 --out out/bench/data
+"""
+
+import os, sys, random, argparse
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from workbook_io import write_workbook
+
+BASE_COLUMNS = ["약제분류번호", "약제분류명", "구분", "세부인정기준 및 방법"]
+SPECIALS = "㎍㎎㎖αβγμ·×~-/"
+
+CLASS_NAMES = [
+    "주로 그람양성균에 작용하는 것", "항악성종양제", "기타의 호르몬제", "혈액 및 체액용약",
+    "해열.진통.소염제", "당뇨병용제", "기타의 중추신경용 약", "생물학적 제제",
+]
+DRUGS = [
+    "Peginterferon", "Interferon", "Epoetin", "Darbepoetin", "Filgrastim", "Somatropin",
+    "Adalimumab", "Etanercept", "Ramosetron", "Buprenorphine", "Fentanyl", "Insulin glargine",
+]
+PRODUCT_SUFFIX = ["주", "정", "캡슐", "프리필드주", "패취", "시럽", "점안액", "주사제"]
+# {d}=약제명, {g}=그리스 문자, {n}/{m}=숫자, {u}=단위
+FRAGMENTS = [
+    "{d} {g}-2a 주사제 (품명 : {p})",
+    "1회 {n}{u} 투여",
+    "TNF-{g} 억제제 투여 시",
+    "{n}㎎/㎖ 시럽",
+    "{n} ug 정",
+    "{n}mcg 패치",
+    "Hb 10 g/dL 이하인 경우",
+    "{n} g 산제",
+    "{n}μg/kg 용량으로",
+    "IL-1{g} 수용체 길항제",
+    "주 {n}~{m}회",
+    "{n}×{m} 주기",
+    "{d}·{d2} 병용",
+    "{n}.5{u}/일",
+]
+PROSE = [
+    "요양급여의 적용기준 및 방법에 관한 세부사항에 따라 아래와 같이 투여 시 요양급여를 인정함",
+    "허가사항 범위 내에서 투여한 경우에 한하여 인정하며",
+    "다만, 이 경우 투여 기간은 최대 6개월까지 인정함",
+    "그 외에는 약값 전액을 환자가 부담토록 함",
+    "투여 전 검사 결과를 진료기록부에 기재하여야 함",
+    "소아에게 투여하는 경우 체중에 따라 용량을 조절함",
+    "이전 치료에 실패하였거나 부작용으로 투여를 중단한 환자",
+]
+
+def make_text(rng: random.Random, n_fragments: int) -> str:
+    parts = []
+    for _ in range(n_fragments):
+        if rng.random() < 0.4:
+            parts.append(rng.choice(PROSE))
+            continue
+        d, d2 = rng.sample(DRUGS, 2)
+        parts.append(rng.choice(FRAGMENTS).format(
+            d=d, d2=d2, g=rng.choice("αβγ"), n=rng.choice([1, 2, 2.5, 5, 10, 20, 75, 150, 300]),
+            m=rng.choice([2, 3, 4, 6]), u=rng.choice(["㎍", "㎎", "㎖"]),
+            p=d[:3] + rng.choice(PRODUCT_SUFFIX)))
+    return ", ".join(parts)
+
+def corrupt(rng: random.Random, text: str) -> str:
+    """특수문자 위치 중 1~2곳을 �로"""
+    pos = [i for i, ch in enumerate(text) if ch in SPECIALS]
+    if not pos:
+        return text
+    chars = list(text)
+    for i in rng.sample(pos, min(len(pos), rng.choice([1, 1, 2]))):
+        chars[i] = "�"
+    return "".join(chars)
+
+def make_rows(n_rows: int, extra_cols: int = 0, density: float = 0.05, seed: int = 0):
+    """
+    반환: (깨진 DataFrame, 원문 DataFrame)
+    """
+    rng = random.Random(seed)
+    columns = BASE_COLUMNS + [f"비고{i+1}" for i in range(extra_cols)]
+    clean, broken = [], []
+    for r in range(n_rows):
+        row = {
+            "약제분류번호": str(rng.choice([111, 214, 399, 421, 611, 639])),
+            "약제분류명": rng.choice(CLASS_NAMES),
+            "구분": make_text(rng, 1),
+            "세부인정기준 및 방법": make_text(rng, rng.randint(2, 6)),
+        }
+        for i in range(extra_cols):
+            row[f"비고{i+1}"] = make_text(rng, 1) if rng.random() < 0.5 else None
+        clean.append(row)
+        bad = dict(row)
+        for col in columns[2:]:
+            if bad[col] and rng.random() < density:
+                bad[col] = corrupt(rng, bad[col])
+        broken.append(bad)
+    return pd.DataFrame(broken, columns=columns), pd.DataFrame(clean, columns=columns)
+
+def write_workbook_xlsx(path: str, df: pd.DataFrame, sheet: str = "Sheet1"):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    write_workbook(path, {sheet: df})
+
+def wrap_line(text: str, width: int):
+    line = ""
+    for word in text.split(" "):
+        if line and len(line) + 1 + len(word) > width:
+            yield line
+            line = word
+        else:
+            line = f"{line} {word}" if line else word
+    if line:
+        yield line
+
+def write_reference_pdf(path: str, clean: pd.DataFrame, min_pages: int = 1, seed: int = 0,
+                        lines_per_page: int = 60, width: int = 70):
+    import fitz  # PyMuPDF
+    rng = random.Random(seed + 1)
+    lines = []
+    for col in clean.columns[2:]:
+        for val in clean[col].dropna():
+            lines.extend(wrap_line(val, width))
+    while len(lines) < min_pages * lines_per_page:
+        lines.extend(wrap_line(make_text(rng, 3), width))
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    doc = fitz.open()
+    for start in range(0, len(lines), lines_per_page):
+        page = doc.new_page()
+        page.insert_text((40, 50), "\n".join(lines[start:start + lines_per_page]),
+                         fontname="korea", fontsize=8)
+    doc.save(path)
+    doc.close()
+    return (len(lines) + lines_per_page - 1) // lines_per_page
+
+def write_mapping_csv(path: str, n_pairs: int = 200, seed: int = 0):
+    rng = random.Random(seed + 2)
+    pairs = [("�", "㎍", "주요 단위 복구")]
+    pairs += [(f"{rng.choice(DRUGS).lower()}-{i}", f"{rng.choice(DRUGS)}-{i}", "합성") for i in range(n_pairs - 1)]
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    pd.DataFrame(pairs, columns=["before", "after", "notes"]).to_csv(path, index=False, encoding="utf-8-sig")
+
+def generate(out_dir: str, rows: int, extra_cols: int = 0, density: float = 0.05,
+             pages: int = 1, mapping_pairs: int = 200, seed: int = 0) -> dict:
+    """합성 데이터 한 벌 생성 → 경로/규모 dict"""
+    broken, clean = make_rows(rows, extra_cols, density, seed)
+    paths = {
+        "xlsx": os.path.join(out_dir, "요양심사약제_synthetic.xlsx"),
+        "pdf": os.path.join(out_dir, "세부사항_synthetic.pdf"),
+        "mapping": os.path.join(out_dir, "mapping.csv"),
+    }
+    write_workbook_xlsx(paths["xlsx"], broken)
+    n_pages = write_reference_pdf(paths["pdf"], clean, pages, seed)
+    write_mapping_csv(paths["mapping"], mapping_pairs, seed)
+    n_fffd = int(sum(broken[c].str.contains("�", regex=False, na=False).sum() for c in broken.columns))
+    return dict(paths, rows=rows, cols=len(broken.columns), fffd_cells=n_fffd, pages=n_pages)
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="벤치마크용 합성 엑셀/PDF 생성")
+    ap.add_argument("--rows", type=int, default=1000)
+    ap.add_argument("--extra-cols", type=int, default=0, help="비고 컬럼 추가 수")
+    ap.add_argument("--density", type=float, default=0.05, help="텍스트 셀 중 �로 깨뜨릴 비율")
+    ap.add_argument("--pages", type=int, default=50, help="PDF 최소 페이지 수")
+    ap.add_argument("--mapping-pairs", type=int, default=200)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--out", default=os.path.join("out", "bench", "data"))
+    return ap.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    info = generate(args.out, args.rows, args.extra_cols, args.density, args.pages,
+                    args.mapping_pairs, args.seed)
+    for k, v in info.items():
+        print(f"{k:>10}: {v}")
+
+if __name__ == "__main__":
+    main()
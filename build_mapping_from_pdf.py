@@ -7,21 +7,47 @@ PDF 역검색으로 �(U+FFFD) 교정 후보 제안 → mapping.csv 반자동 
   data/요양급여의 적용기준 및방법에 관한 세부사항(약제).pdf
 출력:
   out/mapping_candidates.csv             # 후보/근거(페이지) 제안표
+  out/pdf_cache/                         # PDF 페이지 텍스트 캐시 (pdf_text_cache.py)
+  out/.fingerprints/build_mapping.pkl    # 셀 지문 + 점수 (증분 재처리용)
+  out/mapping_incremental_report.csv     # 셀별 재사용/재계산 현황
+  out/.memo/context_scores.pkl           # (좌/우 문맥) → 후보별 페이지 매칭 메모 (PDF 해시·후보 집합 기준)
+  out/metrics/build_mapping_from_pdf-<시각>.json  # 실행 지표 (run_metrics.py)
+  --batch <폴더|glob|파일 ...>: 여러 엑셀을 PDF 한 번 로딩/색인으로 처리
+    out/batch/<엑셀 이름>/mapping_candidates.csv + mapping_incremental_report.csv (+ 셀 지문)
+    out/batch/batch_summary.csv          # 엑셀별 � 셀/후보 유무/재사용/오류 요약
   data/mapping.csv                       # (선택) 확정본 생성용; 아래 '확정 단계' 참고
 """
 
-import re, os, csv
+import re, os, csv, glob, pickle, argparse
+import multiprocessing as mp
 from collections import defaultdict, Counter
 import pandas as pd
-import fitz  # PyMuPDF
+from pdf_text_cache import load_pages, file_sha256
+from workbook_io import read_workbook
+from fffd_index import find_fffd_cells
+from fingerprint_store import (cell_fingerprint, load_store, save_store,
+                               plan_incremental, build_store, write_report)
+from run_metrics import COUNTERS, timer, count, write_metrics
+from run_profile import add_profile_args, profiled
 
 # 경로
-BASE = r"C:\Jimin\pharmaLex_sentinel"
-IN_XLSX = os.path.join(BASE, r"data\요양심사약제_후처리.xlsx")
-IN_PDF  = os.path.join(BASE, r"data\요양급여의 적용기준 및방법에 관한 세부사항(약제).pdf")
+BASE = os.environ.get("PHARMALEX_BASE", r"C:\Jimin\pharmaLex_sentinel")  # 환경변수 PHARMALEX_BASE로 변경 가능
+IN_XLSX = os.path.join(BASE, "data", "요양심사약제_후처리.xlsx")
+IN_PDF  = os.path.join(BASE, "data", "요양급여의 적용기준 및방법에 관한 세부사항(약제).pdf")
 OUT_DIR = os.path.join(BASE, "out")
 CAND_CSV = os.path.join(OUT_DIR, "mapping_candidates.csv")
-FINAL_MAP = os.path.join(BASE, r"data\mapping.csv")
+PDF_CACHE_DIR = os.path.join(OUT_DIR, "pdf_cache")  # None이면 캐시 미사용
+PDF_WORKERS = 1                                     # PDF 페이지 추출 프로세스 수 (--workers)
+SCORE_JOBS = 1                                      # � 셀 후보 점수 계산 프로세스 수 (--jobs)
+FINAL_MAP = os.path.join(BASE, "data", "mapping.csv")
+INCREMENTAL = True                                  # 지문이 같은 셀은 지난 점수 재사용 (--full이면 전부 재계산)
+FP_STORE = os.path.join(OUT_DIR, ".fingerprints", "build_mapping.pkl")
+INC_REPORT = os.path.join(OUT_DIR, "mapping_incremental_report.csv")
+CONTEXT_MEMO = os.path.join(OUT_DIR, ".memo", "context_scores.pkl")  # 문맥 점수 메모 (None이면 실행 내에서만)
+CONTEXT_MEMO_VERSION = 1
+CONTEXT_MEMO_MAX = 200_000                          # 디스크에 남길 최근 문맥 수 (LRU)
+BATCH_DIR = os.path.join(OUT_DIR, "batch")          # --batch: 엑셀별 산출물 폴더
+BATCH_SUMMARY = os.path.join(BATCH_DIR, "batch_summary.csv")
 
 # � 대체 후보(필요 시 추가)
 CANDIDATES = ["㎍","㎎","㎖","α","β","γ","μ","-","·","×","~","/"]
@@ -29,16 +55,15 @@ CANDIDATES = ["㎍","㎎","㎖","α","β","γ","μ","-","·","×","~","/"]
 # 검색 옵션
 CONTEXT_CHARS = 12        # � 좌우로 붙일 문맥 길이
 CASE_INSENSITIVE = True   # 대소문자 무시
+NGRAM_N = 3               # 페이지 색인용 문자 n-gram 길이
+SINGLE_PASS = True        # 문맥당 정규식 1개로 모든 후보를 한 번에 집계
 
-def load_pdf_text_by_page(pdf_path):
-    doc = fitz.open(pdf_path)
-    pages = []
-    for p in doc:
-        txt = p.get_text("text")
-        if CASE_INSENSITIVE: txt = txt.lower()
-        # 공백 정규화
-        txt = re.sub(r"\s+", " ", txt)
-        pages.append(txt)
+def load_pdf_text_by_page(pdf_path, workers=1):
+    # 소문자화(CASE_INSENSITIVE) + 공백 정규화된 페이지 텍스트 (PDF 해시 기준 캐시)
+    with timer("load_pdf_text_by_page"):
+        pages = load_pages(pdf_path, lower=CASE_INSENSITIVE, collapse_ws=True,
+                           cache_dir=PDF_CACHE_DIR, workers=workers)
+    count("pdf.pages_loaded", len(pages))
     return pages
 
 def normalize(s):
@@ -48,53 +73,149 @@ def normalize(s):
     return s.lower() if CASE_INSENSITIVE else s
 
 def iter_fffd_cells(xlsx_path):
-    xls = pd.ExcelFile(xlsx_path)
-    for sheet in xls.sheet_names:
-        df = pd.read_excel(xlsx_path, sheet_name=sheet, dtype=str)
-        for col in df.columns:
-            for ridx, val in df[col].items():
-                if pd.isna(val): continue
-                if "�" in str(val):
-                    yield sheet, col, ridx, str(val)
+    with timer("iter_fffd_cells"):
+        hits = find_fffd_cells(read_workbook(xlsx_path, copy=False))
+    # fffd_cells 카운터는 호출측(run / run_batch)에서 한 번만 센다
+    yield from hits[["sheet", "column", "row_idx", "value"]].itertuples(index=False, name=None)
 
-def build_regex_from_context(text_with_fffd, pos, candidate):
+def build_ngram_index(pages_text, n=NGRAM_N):
     """
-    text_with_fffd에서 pos 위치의 � 하나를 candidate로 치환한 '느슨한' 정규식 패턴 생성
-    - 좌우로 CONTEXT_CHARS 만큼 문맥을 사용 (공백은 \s+로 느슨하게)
+    페이지 텍스트 → {n-gram: set(page_idx)} 역색인 (한 번만 만들어 재사용)
+    """
+    index = defaultdict(set)
+    for pidx, page_txt in enumerate(pages_text):
+        for gram in {page_txt[i:i+n] for i in range(len(page_txt) - n + 1)}:
+            index[gram].add(pidx)
+    return index
+
+def candidate_pages(index, literal, n_pages, n=NGRAM_N):
     """
+    literal(좌문맥+후보+우문맥)을 포함할 수 있는 페이지만 추려서 오름차순으로 반환
+    - 공백은 정규식에서 \s+로 느슨하게 매칭되므로 공백 기준 조각별로만 n-gram을 요구
+    - n-gram이 하나도 없으면(문맥이 너무 짧음) 전체 페이지
+    """
+    pages = None
+    for piece in literal.split(" "):
+        for i in range(len(piece) - n + 1):
+            posting = index.get(piece[i:i+n])
+            if not posting:
+                return []
+            pages = set(posting) if pages is None else pages & posting
+            if not pages:
+                return []
+    if pages is None:
+        return range(n_pages)
+    return sorted(pages)
+
+def split_context(text_with_fffd, pos):
     left = text_with_fffd[max(0, pos - CONTEXT_CHARS):pos]
     right = text_with_fffd[pos+1: pos+1+CONTEXT_CHARS]
+    return left, right
 
-    # 정규식 이스케이프 + 공백 느슨화
-    def esc_relax(s):
-        s = re.escape(s)
-        s = s.replace(r"\ ", r"\s+")
-        return s
+# 정규식 이스케이프 + 공백 느슨화
+def esc_relax(s):
+    s = re.escape(s)
+    s = s.replace(r"\ ", r"\s+")
+    return s
 
+def build_regex_from_context(text_with_fffd, pos, candidate):
+    """
+    text_with_fffd에서 pos 위치의 � 하나를 candidate로 치환한 '느슨한' 정규식 패턴 생성
+    - 좌우로 CONTEXT_CHARS 만큼 문맥을 사용 (공백은 \s+로 느슨하게)
+    """
+    left, right = split_context(text_with_fffd, pos)
     pat = esc_relax(left) + re.escape(candidate) + esc_relax(right)
     return re.compile(pat)
 
-def scan_candidates_in_pdf(pages_text, text_val):
+def build_multi_regex_from_context(text_with_fffd, pos, candidates):
     """
-    셀 문자열(text_val) 안의 모든 �에 대해 후보별로 PDF 페이지에서 매칭 수를 센다.
-    반환: dict(candidate -> list of (page_idx, count)) 와 최고의 후보 집계
+    pos 위치의 �에 candidates 전체를 한 번에 시험하는 단일 정규식
+    - 좌문맥 뒤에서 후보별로 (?=(후보+우문맥))를 선택적으로 검사 → 그룹 i+1이 잡히면 후보 i 매칭
+    - 전체를 전방탐색으로 감싸 모든 시작 위치를 열거 (후보별 비중첩 판정은 count_multi_hits)
     """
-    t = normalize(text_val)
-    # � 위치들
-    pos_list = [m.start() for m in re.finditer("�", t)]
-    if not pos_list:
-        return {}
+    left, right = split_context(text_with_fffd, pos)
+    slots = "".join(f"(?:(?=({re.escape(c)}{esc_relax(right)})))?" for c in candidates)
+    return re.compile(f"(?={esc_relax(left)}{slots})")
 
-    page_hits = {cand: Counter() for cand in CANDIDATES}
+def count_multi_hits(rgx, page_txt, n_cands):
+    """
+    build_multi_regex_from_context 패턴으로 페이지를 한 번 훑어 후보별 매칭 수를 센다.
+    후보마다 직전 매칭 끝 이후에서만 세므로 후보별 finditer(비중첩) 결과와 같다.
+    """
+    counts = [0] * n_cands
+    last_end = [0] * n_cands
+    for m in rgx.finditer(page_txt):
+        start = m.start()
+        for i in range(n_cands):
+            end = m.end(i + 1)
+            if end != -1 and start >= last_end[i]:
+                counts[i] += 1
+                last_end[i] = end
+    return counts
 
-    for pos in pos_list:
-        for cand in CANDIDATES:
-            rgx = build_regex_from_context(t, pos, cand)
-            for pidx, page_txt in enumerate(pages_text):
-                # 페이지에서 패턴 매칭 수
-                hits = len(list(rgx.finditer(page_txt)))
+def scan_context_in_pdf(pages_text, left, right, index=None):
+    """
+    � 하나의 좌/우 문맥에 대해 후보별 PDF 페이지 매칭 수를 센다.
+    - index(build_ngram_index 결과)가 주어지면 문맥을 포함할 수 있는 페이지만 정규식 검사
+    반환: CANDIDATES 순서의 튜플, 각 원소는 ((1-based page, hits), ...) (페이지 순)
+    """
+    t = left + "�" + right
+    pos = len(left)
+    if SINGLE_PASS:
+        per_cand = [[] for _ in CANDIDATES]
+        rgx = build_multi_regex_from_context(t, pos, CANDIDATES)
+        if index is None:
+            pidx_list = range(len(pages_text))
+        else:
+            # 후보 자리를 공백으로 끊어 좌/우 문맥 조각만 요구
+            pidx_list = candidate_pages(index, left + " " + right, len(pages_text))
+        for pidx in pidx_list:
+            counts = count_multi_hits(rgx, pages_text[pidx], len(CANDIDATES))
+            for hits_list, hits in zip(per_cand, counts):
                 if hits > 0:
-                    page_hits[cand][pidx+1] += hits  # 1-based page
+                    hits_list.append((pidx+1, hits))  # 1-based page
+        count("scan.contexts")
+        count("scan.pages_scanned", len(pidx_list))
+        count("scan.regex_evals", len(pidx_list))   # 페이지당 정규식 1회
+        return tuple(tuple(h) for h in per_cand)
+
+    per_cand = []
+    for cand in CANDIDATES:
+        rgx = build_regex_from_context(t, pos, cand)
+        if index is None:
+            pidx_list = range(len(pages_text))
+        else:
+            pidx_list = candidate_pages(index, left + cand + right, len(pages_text))
+        hits_list = []
+        for pidx in pidx_list:
+            page_txt = pages_text[pidx]
+            # 페이지에서 패턴 매칭 수
+            hits = len(list(rgx.finditer(page_txt)))
+            if hits > 0:
+                hits_list.append((pidx+1, hits))  # 1-based page
+        per_cand.append(tuple(hits_list))
+        count("scan.pages_scanned", len(pidx_list))
+        count("scan.regex_evals", len(pidx_list))
+    count("scan.contexts")
+    return tuple(per_cand)
+
+def cell_contexts(text_val):
+    """셀 문자열 → 정규화 텍스트 기준 � 위치별 (좌문맥, 우문맥) 리스트"""
+    t = normalize(text_val)
+    return [split_context(t, m.start()) for m in re.finditer("�", t)]
+
+def summarize_context_hits(context_hits):
+    """
+    � 위치별 scan_context_in_pdf 결과 → 셀 단위 후보 요약
+    반환: dict(candidate -> {"total", "top_pages"})
+    """
+    if not context_hits:
+        return {}
+    page_hits = {cand: Counter() for cand in CANDIDATES}
+    for per_cand in context_hits:
+        for cand, hits_list in zip(CANDIDATES, per_cand):
+            for page, hits in hits_list:
+                page_hits[cand][page] += hits
 
     # 후보 요약 (페이지/카운트)
     summary = {}
@@ -106,15 +227,129 @@ def scan_candidates_in_pdf(pages_text, text_val):
             summary[cand] = {"total": total, "top_pages": top3}
     return summary
 
-def main():
-    os.makedirs(OUT_DIR, exist_ok=True)
-    print("[1/3] PDF 로딩…")
-    pages = load_pdf_text_by_page(IN_PDF)
+# 문맥 점수 메모: (좌문맥, 우문맥) → scan_context_in_pdf 결과
+# 디스크 저장 시 (PDF 해시, 후보 집합, 대소문자 옵션)을 salt로 함께 기록 → 다르면 버림
+# 적중/미스는 run_metrics 카운터 context_memo.hit / context_memo.miss 로 집계
+
+def memo_get(memo, key):
+    # LRU: 적중한 문맥은 맨 뒤(최근)로 옮김
+    hit = memo.pop(key, None)
+    if hit is not None:
+        memo[key] = hit
+    return hit
+
+def scan_candidates_in_pdf(pages_text, text_val, index=None, memo=None):
+    """
+    셀 문자열(text_val) 안의 모든 �에 대해 후보별로 PDF 페이지에서 매칭 수를 센다.
+    - memo({(좌문맥, 우문맥): 결과})가 주어지면 같은 문맥은 다시 검색하지 않음
+    반환: dict(candidate -> {"total", "top_pages"})
+    """
+    context_hits = []
+    for left, right in cell_contexts(text_val):
+        hit = memo_get(memo, (left, right)) if memo is not None else None
+        if hit is None:
+            count("context_memo.miss")
+            hit = scan_context_in_pdf(pages_text, left, right, index)
+            if memo is not None:
+                memo[(left, right)] = hit
+        else:
+            count("context_memo.hit")
+        context_hits.append(hit)
+    return summarize_context_hits(context_hits)
+
+def load_context_memo(path, salt) -> dict:
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path, "rb") as f:
+        data = pickle.load(f)
+    if data.get("version") != CONTEXT_MEMO_VERSION or data.get("salt") != salt:
+        return {}
+    return data["contexts"]
+
+def save_context_memo(path, salt, memo, max_entries=None):
+    if not path:
+        return
+    max_entries = CONTEXT_MEMO_MAX if max_entries is None else max_entries
+    items = list(memo.items())
+    if max_entries and len(items) > max_entries:
+        items = items[-max_entries:]  # 최근 사용 순으로 남김
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + ".tmp", "wb") as f:
+        pickle.dump({"version": CONTEXT_MEMO_VERSION, "salt": salt, "contexts": dict(items)}, f,
+                    protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(path + ".tmp", path)
+
+# 병렬 점수 계산 워커 전역: fork면 부모 메모리를 그대로 상속(복사/피클 없음),
+# spawn(Windows)이면 initializer 인자로 워커당 한 번만 전달된다.
+WORKER_PAGES = None
+WORKER_INDEX = None
+
+def init_scoring_worker(pages, index):
+    global WORKER_PAGES, WORKER_INDEX
+    WORKER_PAGES, WORKER_INDEX = pages, index
+
+def score_context_in_worker(context):
+    return scan_context_in_pdf(WORKER_PAGES, context[0], context[1], WORKER_INDEX)
+
+def missing_contexts(values, memo):
+    """memo에 없는 고유 문맥 (첫 등장 순)"""
+    seen = {}
+    for v in values:
+        for ctx in cell_contexts(v):
+            if ctx not in memo and ctx not in seen:
+                seen[ctx] = True
+    return list(seen)
 
+def score_contexts(pages, index, contexts, jobs=1):
+    if jobs <= 1 or len(contexts) < 2:
+        return [scan_context_in_pdf(pages, l, r, index) for l, r in contexts]
+    methods = mp.get_all_start_methods()
+    ctx = mp.get_context("fork" if "fork" in methods else None)
+    chunksize = max(1, len(contexts) // (jobs * 8))
+    with ctx.Pool(jobs, initializer=init_scoring_worker, initargs=(pages, index)) as pool:
+        return pool.map(score_context_in_worker, contexts, chunksize=chunksize)
+
+def score_cells(pages, index, values, jobs=1, memo=None):
+    """
+    셀 문자열 리스트 → scan_candidates_in_pdf 결과 리스트 (입력 순서 유지)
+    - 고유 문맥만 PDF에서 검색(병렬 가능) → memo에 채운 뒤 셀별로 조립
+    - pages가 None이면 memo에 이미 모든 문맥이 있어야 함 (missing_contexts로 확인)
+    """
+    memo = {} if memo is None else memo
+    todo = missing_contexts(values, memo)
+    if todo:
+        for context, hit in zip(todo, score_contexts(pages, index, todo, jobs)):
+            memo[context] = hit
+    results, lookups = [], 0
+    for v in values:
+        contexts = cell_contexts(v)
+        lookups += len(contexts)
+        results.append(summarize_context_hits([memo_get(memo, c) for c in contexts]))
+    # 처음 검색한 고유 문맥 = 미스, 나머지 조회 = 적중
+    count("context_memo.miss", len(todo))
+    count("context_memo.hit", lookups - len(todo))
+    return results
+
+def add_arguments(ap):
+    ap.add_argument("--workers", type=int, default=PDF_WORKERS,
+                    help="PDF 페이지 추출 프로세스 수 (1이면 직렬)")
+    ap.add_argument("--jobs", type=int, default=SCORE_JOBS,
+                    help="� 셀 후보 점수 계산 프로세스 수 (1이면 직렬)")
+    ap.add_argument("--full", action="store_true",
+                    help="지난 실행 결과(셀 지문·문맥 메모)를 재사용하지 않고 모든 셀을 다시 계산")
+    ap.add_argument("--batch", nargs="+", metavar="PATH",
+                    help="여러 엑셀 일괄 처리: 폴더(안의 *.xlsx) / glob / 파일. PDF는 한 번만 로딩")
+    add_profile_args(ap)
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="PDF 역검색으로 � 교정 후보표 생성")
+    add_arguments(ap)
+    return ap.parse_args(argv)
+
+def candidate_rows(cells, all_stats):
+    """� 셀 + 셀별 후보 요약 → mapping_candidates.csv 행 리스트"""
     rows = []
-    print("[2/3] 엑셀 내 � 셀 스캔…")
-    for sheet, col, ridx, val in iter_fffd_cells(IN_XLSX):
-        cand_stats = scan_candidates_in_pdf(pages, val)
+    for (sheet, col, ridx, val), cand_stats in zip(cells, all_stats):
         # 후보가 하나도 안 잡히면 공란으로
         if not cand_stats:
             rows.append({
@@ -138,11 +373,188 @@ def main():
             "candidate_scores": scores,
             "final_after": ""  # 사람이 최종 확정
         })
+    return rows
+
+def scoring_salt(pdf_sha):
+    # 점수 결과에 영향을 주는 입력/설정 (바뀌면 모든 셀 재계산)
+    return (pdf_sha, tuple(CANDIDATES), CONTEXT_CHARS, CASE_INSENSITIVE)
+
+def context_memo_salt(pdf_sha):
+    # 문맥 메모 무효화 기준 (문맥 길이는 키 자체에 반영됨)
+    return (pdf_sha, tuple(CANDIDATES), CASE_INSENSITIVE)
 
+def expand_workbooks(specs):
+    """폴더 / glob / 파일 경로 목록 → 엑셀 경로 (중복 제거, 지정 순서; 폴더·glob 안은 이름순)"""
+    found = []
+    for spec in specs:
+        if os.path.isdir(spec):
+            paths = sorted(glob.glob(os.path.join(spec, "*.xlsx")))
+        elif glob.has_magic(spec):
+            paths = sorted(glob.glob(spec))
+        else:
+            paths = [spec]
+        # 엑셀이 열려 있을 때 생기는 잠금 파일(~$...) 제외
+        found += [p for p in paths if not os.path.basename(p).startswith("~$")]
+    return list(dict.fromkeys(found))
+
+def batch_out_dirs(paths):
+    # 엑셀 이름(확장자 제외)별 폴더, 이름이 겹치면 _2, _3 …
+    dirs, seen = [], Counter()
+    for path in paths:
+        stem = os.path.splitext(os.path.basename(path))[0]
+        seen[stem] += 1
+        dirs.append(os.path.join(BATCH_DIR, stem if seen[stem] == 1 else f"{stem}_{seen[stem]}"))
+    return dirs
+
+def read_fffd_cells(path):
+    """반환: (� 셀 리스트, 오류 문자열 또는 None) — 배치에서 엑셀 하나가 깨져도 나머지는 계속"""
+    try:
+        return list(iter_fffd_cells(path)), None
+    except Exception as e:
+        return [], f"{type(e).__name__}: {e}"
+
+def read_workbooks(paths, jobs=1):
+    # 엑셀 파싱은 파일 단위로 병렬 (결과는 � 셀만이라 작음)
+    if jobs <= 1 or len(paths) < 2:
+        return [read_fffd_cells(p) for p in paths]
+    methods = mp.get_all_start_methods()
+    ctx = mp.get_context("fork" if "fork" in methods else None)
+    with ctx.Pool(min(jobs, len(paths))) as pool:
+        return pool.map(read_fffd_cells, paths, chunksize=1)
+
+def run_batch(args):
+    """
+    여러 엑셀 → 엑셀별 후보표. PDF 로딩·n-gram 색인·문맥 메모는 전체에서 한 번
+    - 모든 엑셀의 재계산 대상 셀을 모아 고유 문맥만 PDF에서 검색 (--jobs면 프로세스 풀로 분산)
+      → 부서별 엑셀에 같은 문구가 반복되면 한 번만 검색
+    - 엑셀별 증분 저장소/리포트는 각자 폴더에 (단독 실행과 같은 규칙)
+    """
+    paths = expand_workbooks(args.batch)
+    if not paths:
+        print("[BATCH] 처리할 엑셀 없음:", " ".join(args.batch))
+        return
+    out_dirs = batch_out_dirs(paths)
+    print(f"[1/3] 엑셀 {len(paths)}개 � 셀 스캔…")
+    with timer("batch.read_workbooks"):
+        scanned = read_workbooks(paths, args.jobs)
+
+    pdf_sha = file_sha256(IN_PDF)
+    salt = scoring_salt(pdf_sha)
+    books, values = [], []
+    for path, out_dir, (cells, error) in zip(paths, out_dirs, scanned):
+        keys = [(sheet, int(ridx)+2, col) for sheet, col, ridx, _ in cells]
+        fps = [cell_fingerprint(c[3], salt) for c in cells]
+        store = os.path.join(out_dir, ".fingerprints", "build_mapping.pkl")
+        prev = load_store(store) if INCREMENTAL and not args.full and not error else {}
+        todo, reused, status = plan_incremental(prev, keys, fps)
+        books.append({"path": path, "out_dir": out_dir, "cells": cells, "error": error, "keys": keys,
+                      "fps": fps, "store": store, "prev": prev, "todo": todo, "reused": reused,
+                      "status": status, "offset": len(values)})
+        values += [cells[i][3] for i in todo]
+    count("fffd_cells", sum(len(b["cells"]) for b in books))
+    count("cells_reused", sum(len(b["reused"]) for b in books))
+
+    todo_stats = []
+    if values:
+        print(f"[2/3] 후보 점수 계산 ({len(values)}셀, 엑셀 {sum(1 for b in books if b['todo'])}개)…")
+        memo_salt = context_memo_salt(pdf_sha)
+        memo = {} if args.full else load_context_memo(CONTEXT_MEMO, memo_salt)
+        pages = index = None
+        if missing_contexts(values, memo):
+            print("      PDF 로딩(1회)…")
+            pages = load_pdf_text_by_page(IN_PDF, workers=args.workers)
+            index = build_ngram_index(pages)
+        with timer("score_cells"):
+            todo_stats = score_cells(pages, index, values, jobs=args.jobs, memo=memo)
+        save_context_memo(CONTEXT_MEMO, memo_salt, memo)
+        print(f"[MEMO] 문맥 메모 적중 {COUNTERS['context_memo.hit']} / 미스 {COUNTERS['context_memo.miss']}"
+              f" (저장 문맥 {len(memo)})")
+    else:
+        print("[2/3] 바뀐 셀 없음 → PDF 로딩/점수 계산 생략")
+
+    print("[3/3] 엑셀별 후보표 저장…")
+    summary = []
+    for b in books:
+        row = {"workbook": b["path"], "out_dir": b["out_dir"], "fffd_cells": len(b["cells"]),
+               "with_candidates": 0, "without_candidates": 0, "reused": len(b["reused"]),
+               "recalculated": len(b["todo"]), "error": b["error"] or ""}
+        summary.append(row)
+        if b["error"]:
+            print(f"   ✗ {b['path']}: {b['error']}")
+            continue
+        all_stats = [b["reused"].get(i) for i in range(len(b["cells"]))]
+        for j, i in enumerate(b["todo"]):
+            all_stats[i] = todo_stats[b["offset"] + j]
+        os.makedirs(b["out_dir"], exist_ok=True)
+        save_store(b["store"], build_store(b["keys"], b["fps"], all_stats))
+        write_report(os.path.join(b["out_dir"], "mapping_incremental_report.csv"), "build_mapping",
+                     b["keys"], b["fps"], b["status"], b["prev"])
+        rows = candidate_rows(b["cells"], all_stats)
+        pd.DataFrame(rows).to_csv(os.path.join(b["out_dir"], "mapping_candidates.csv"),
+                                  index=False, encoding="utf-8-sig")
+        row["with_candidates"] = sum(1 for r in rows if r["best_candidate"])
+        row["without_candidates"] = len(rows) - row["with_candidates"]
+        print(f"   ✓ {os.path.basename(b['path'])}: � {row['fffd_cells']}셀 (후보 {row['with_candidates']},"
+              f" 재사용 {row['reused']}) → {b['out_dir']}")
+
+    df = pd.DataFrame(summary)
+    os.makedirs(os.path.dirname(BATCH_SUMMARY), exist_ok=True)
+    df.to_csv(BATCH_SUMMARY, index=False, encoding="utf-8-sig")
+    n_err = int((df["error"] != "").sum())
+    print(f"[BATCH] 엑셀 {len(df)}개 (오류 {n_err}) / � 셀 {df['fffd_cells'].sum()} "
+          f"/ 후보 있음 {df['with_candidates'].sum()} → {BATCH_SUMMARY}")
+    print("[METRICS]", write_metrics(OUT_DIR, "build_mapping_batch"))
+
+def run(args):
+    os.makedirs(OUT_DIR, exist_ok=True)
+    if args.batch:
+        run_batch(args)
+        return
+    print("[1/3] 엑셀 내 � 셀 스캔…")
+    cells = list(iter_fffd_cells(IN_XLSX))
+    count("fffd_cells", len(cells))
+    keys = [(sheet, int(ridx)+2, col) for sheet, col, ridx, _ in cells]
+    pdf_sha = file_sha256(IN_PDF)
+    salt = scoring_salt(pdf_sha)
+    fps = [cell_fingerprint(c[3], salt) for c in cells]
+    prev = load_store(FP_STORE) if INCREMENTAL and not args.full else {}
+    todo, reused, status = plan_incremental(prev, keys, fps)
+
+    all_stats = [reused.get(i) for i in range(len(cells))]
+    if todo:
+        print(f"[2/3] 후보 점수 계산 ({len(todo)}/{len(cells)} 셀)…")
+        memo_salt = context_memo_salt(pdf_sha)
+        memo = {} if args.full else load_context_memo(CONTEXT_MEMO, memo_salt)
+        values = [cells[i][3] for i in todo]
+        pages = index = None
+        if missing_contexts(values, memo):
+            print("      PDF 로딩…")
+            pages = load_pdf_text_by_page(IN_PDF, workers=args.workers)
+            index = build_ngram_index(pages)
+        with timer("score_cells"):
+            todo_stats = score_cells(pages, index, values, jobs=args.jobs, memo=memo)
+        for i, cand_stats in zip(todo, todo_stats):
+            all_stats[i] = cand_stats
+        save_context_memo(CONTEXT_MEMO, memo_salt, memo)
+        print(f"[MEMO] 문맥 메모 적중 {COUNTERS['context_memo.hit']} / 미스 {COUNTERS['context_memo.miss']}"
+              f" (저장 문맥 {len(memo)})")
+    else:
+        print("[2/3] 바뀐 셀 없음 → PDF 로딩/점수 계산 생략")
+    save_store(FP_STORE, build_store(keys, fps, all_stats))
+    print("[INC]", write_report(INC_REPORT, "build_mapping", keys, fps, status, prev))
+
+    rows = candidate_rows(cells, all_stats)
     print("[3/3] 후보표 저장…")
     pd.DataFrame(rows).to_csv(CAND_CSV, index=False, encoding="utf-8-sig")
     print(f"→ {CAND_CSV}")
+    count("cells_reused", len(reused))
+    print("[METRICS]", write_metrics(OUT_DIR, "build_mapping_from_pdf"))
     print("\n이제 아래 '확정 단계'를 따라 주세요.")
 
+def main(argv=None):
+    args = parse_args(argv)
+    with profiled(OUT_DIR, "build_mapping_from_pdf", args.profile, args.profile_memory, args.profile_top):
+        run(args)
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+"""
+�(U+FFFD) 포함 셀 벡터화 탐지 (build_mapping_from_pdf / auto_fffd_apply / sentinel_pipeline / find_ufffd 공용)
+
+- 셀마다 df.iat / items()로 도는 대신 컬럼 단위 str.contains / str.count로 한 번에 색인
+- 결과 DataFrame 컬럼:
+    sheet, sheet_pos, row_idx(0-based DataFrame 인덱스), col_pos, column, value, count_in_cell
+- 순서: 시트 → 컬럼 → 행 (기존 df[col].items() 루프와 동일)
+"""
+
+import re
+import pandas as pd
+
+FFFD = "�"
+INDEX_COLUMNS = ["sheet", "sheet_pos", "row_idx", "col_pos", "column", "value", "count_in_cell"]
+
+def find_fffd_cells(sheets, ch=FFFD):
+    """
+    sheets: {시트명: DataFrame} (workbook_io.read_workbook 결과)
+    """
+    parts = []
+    for sheet_pos, (sheet, df) in enumerate(sheets.items()):
+        for col_pos, col in enumerate(df.columns):
+            s = df.iloc[:, col_pos]
+            s = s[s.notna()].astype(str)
+            hit = s[s.str.contains(ch, regex=False)]
+            if hit.empty:
+                continue
+            parts.append(pd.DataFrame({
+                "sheet": sheet,
+                "sheet_pos": sheet_pos,
+                "row_idx": hit.index,
+                "col_pos": col_pos,
+                "column": [col] * len(hit),
+                "value": hit.to_numpy(dtype=object),
+                "count_in_cell": hit.str.count(re.escape(ch)).to_numpy(),
+            }))
+    if not parts:
+        return pd.DataFrame(columns=INDEX_COLUMNS)
+    return pd.concat(parts, ignore_index=True)[INDEX_COLUMNS]
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""
+셀 지문 저장소 — 증분 재처리 공용 (build_mapping_from_pdf / auto_fffd_apply / sentinel_pipeline)
+
+- 지문: sha1(셀 값 + salt)  · salt = 결과에 영향을 주는 설정
+  (규칙 팩 버전/해시, PDF 해시, 후보표 판정, 임계값 등 — 단계마다 다름)
+- 결과는 지문(내용) 기준으로 저장 → 행이 끼워지거나 지워져 셀 위치가 밀려도 내용이 같으면 재사용
+  (같은 내용의 셀이 여러 개여도 한 번만 계산/저장)
+- 위치 (시트, 엑셀 행번호, 컬럼)는 리포트(이동/변경/삭제 구분)에만 쓰고, 결과를 쓸 위치는 이번 실행의 셀 목록 기준
+- 저장 형식: out/.fingerprints/<단계>.pkl  {"version", "results": {지문: 결과}, "positions": {위치: 지문}}
+  이번 실행에서 보지 못한 지문은 저장 시 제거
+- 리포트: 셀별 상태(reused / moved / changed / new, 사라진 내용은 removed) CSV
+"""
+
+import os, pickle, hashlib
+import pandas as pd
+
+STORE_VERSION = 2
+
+def cell_fingerprint(value, salt=()) -> str:
+    return hashlib.sha1(repr((value, salt)).encode("utf-8", "surrogatepass")).hexdigest()
+
+def rules_salt(pack: dict) -> tuple:
+    # 규칙 팩 버전 + 파일 해시 (버전을 안 올리고 고쳐도 무효화)
+    return (pack.get("name"), pack.get("version"), pack.get("sha256"))
+
+def load_store(path) -> dict:
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path, "rb") as f:
+        data = pickle.load(f)
+    if data.get("version") != STORE_VERSION:
+        return {}
+    return {"results": data["results"], "positions": data["positions"]}
+
+def save_store(path, store: dict):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + ".tmp", "wb") as f:
+        pickle.dump({"version": STORE_VERSION, **store}, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(path + ".tmp", path)
+
+def plan_incremental(store: dict, keys, fingerprints):
+    """
+    반환: (todo 인덱스 리스트, {인덱스: 재사용 결과}, 상태 리스트)
+    재사용 여부는 지문(내용)만으로, 상태(reused/moved/changed/new)는 지난 실행의 같은 위치와 비교해 구분
+    """
+    results, positions = store.get("results", {}), store.get("positions", {})
+    todo, reused, status = [], {}, []
+    for i, (key, fp) in enumerate(zip(keys, fingerprints)):
+        if fp in results:
+            reused[i] = results[fp]
+            status.append("reused" if positions.get(key) == fp else "moved")
+        else:
+            todo.append(i)
+            status.append("new" if key not in positions else "changed")
+    return todo, reused, status
+
+def build_store(keys, fingerprints, results) -> dict:
+    return {"results": dict(zip(fingerprints, results)), "positions": dict(zip(keys, fingerprints))}
+
+def write_report(path, stage: str, keys, fingerprints, status, previous: dict = None):
+    """
+    셀별 상태 CSV + 요약 문자열 반환.
+    previous(지난 저장소)가 있으면 이번 실행 어디에도 없는 지난 내용을 지난 위치로 removed 기록
+    """
+    rows = [{"stage": stage, "sheet": k[0], "row": k[1], "column": k[2], "status": s}
+            for k, s in zip(keys, status)]
+    if previous:
+        current = set(fingerprints)
+        rows += [{"stage": stage, "sheet": k[0], "row": k[1], "column": k[2], "status": "removed"}
+                 for k, fp in previous["positions"].items() if fp not in current]
+    df = pd.DataFrame(rows, columns=["stage", "sheet", "row", "column", "status"])
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    df.to_csv(path, index=False, encoding="utf-8-sig")
+    counts = df["status"].value_counts()
+    return (f"재사용 {counts.get('reused', 0) + counts.get('moved', 0)} (위치 이동 {counts.get('moved', 0)})"
+            f" / 재계산 {counts.get('new', 0) + counts.get('changed', 0)}"
+            f" (신규 {counts.get('new', 0)}, 변경 {counts.get('changed', 0)}, 삭제 {counts.get('removed', 0)})")
@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+"""
+다중 키워드/패턴 매처 — 제형 키워드·실험실 부정 패턴 판정 공용
+(sentinel_pipeline / pharmalex_sentinel_fix 의 should_convert_g_to_micro, scan_ocr_units.has_form_hint)
+
+- 키워드 목록 → 리터럴 alternation 정규식 1개 (긴 키워드 우선), 패턴 목록 → (?:p1)|(?:p2)|... 1개
+  → any(k in t ...) / any(re.search(p, t) ...) 를 텍스트 한 번 스캔으로 대체
+- classify_context: 셀 하나의 (has_form, has_lab)을 한 번에 계산해 셀 안의 모든 g 매칭이 공유
+"""
+
+import re
+
+def compile_keywords(keywords, flags=0):
+    """리터럴 키워드 중 하나라도 포함되는지 검사하는 정규식 (contains_any 대체)"""
+    alts = sorted({re.escape(k) for k in keywords if k}, key=len, reverse=True)
+    # 키워드가 없으면 절대 매칭되지 않는 패턴
+    return re.compile("|".join(alts) if alts else r"(?!x)x", flags)
+
+def compile_any(patterns, flags=0):
+    """정규식 목록 중 하나라도 매칭되는지 검사하는 정규식 (regex_any 대체)"""
+    alts = [f"(?:{p})" for p in patterns]
+    return re.compile("|".join(alts) if alts else r"(?!x)x", flags)
+
+def classify_context(text, form_re, lab_re):
+    """반환: (has_form, has_lab)"""
+    t = text if isinstance(text, str) else str(text)
+    return form_re.search(t) is not None, lab_re.search(t) is not None
@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+"""
+PDF 페이지 텍스트 디스크 캐시 (build_mapping_from_pdf / scan_ocr_units 공용)
+
+- 키: PDF 파일 SHA-256 + 정규화 설정(lower / 공백 축약)
+- 저장 형식:
+    <cache_dir>/<sha256>_<variant>.bin        # 페이지 텍스트(UTF-8)를 이어붙인 본문
+    <cache_dir>/<sha256>_<variant>.idx.json   # 페이지별 바이트 오프셋 표
+- PDF 내용이 바뀌면 해시가 달라지므로 자동으로 다시 추출한다.
+- 정규화 변형(variant)은 raw 캐시에서 파생하므로 PDF는 해시당 한 번만 파싱한다.
+- workers > 1 이면 페이지 구간을 나눠 프로세스 풀에서 추출(결과는 페이지 순서 그대로).
+- 같은 프로세스 안에서는 (경로, 수정시각, 크기) 기준으로 페이지 리스트와 해시를 재사용
+  (pharmalex.py run-all처럼 여러 단계를 한 번에 돌릴 때 PDF를 한 번만 읽음)
+  · 최근에 쓴 PAGES_CACHE_SIZE개 PDF / SHA_CACHE_SIZE개 파일만 유지 — 오래 도는 프로세스에서도 메모리가 쌓이지 않음
+"""
+
+import os, re, json, mmap, hashlib, tempfile
+from concurrent.futures import ProcessPoolExecutor
+from run_metrics import timer, count
+import fitz  # PyMuPDF
+
+CACHE_VERSION = 1
+
+# (절대경로, mtime_ns, size) → 해시 / {variant: 페이지 리스트}  (삽입 순서 = 최근 사용 순서)
+SHA_CACHE = {}
+PAGES_CACHE = {}
+SHA_CACHE_SIZE = 256   # 해시 문자열뿐이라 작음 (stage_graph가 단계 입력·소스 파일마다 씀)
+PAGES_CACHE_SIZE = 2   # run-all은 PDF 하나를 여러 단계가 이어 읽는 정도
+
+def pdf_key(path):
+    st = os.stat(path)
+    return (os.path.abspath(path), st.st_mtime_ns, st.st_size)
+
+def remember(cache, key, value, size):
+    # 같은 경로의 이전 버전은 버리고, 가장 오래 안 쓴 것부터 size개만 남김
+    for old in [k for k in cache if k[0] == key[0]]:
+        del cache[old]
+    cache[key] = value
+    while len(cache) > size:
+        del cache[next(iter(cache))]
+    return value
+
+def file_sha256(path, chunk_size=1 << 20):
+    key = pdf_key(path)
+    digest = SHA_CACHE.pop(key, None)
+    if digest is None:
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                h.update(chunk)
+        digest = h.hexdigest()
+    return remember(SHA_CACHE, key, digest, SHA_CACHE_SIZE)
+
+def clear_pages_cache():
+    SHA_CACHE.clear()
+    PAGES_CACHE.clear()
+
+def variant_name(lower=False, collapse_ws=False):
+    parts = []
+    if collapse_ws: parts.append("ws")
+    if lower: parts.append("lower")
+    return "-".join(parts) if parts else "raw"
+
+def normalize_page(txt, lower=False, collapse_ws=False):
+    if lower: txt = txt.lower()
+    # 공백 정규화
+    if collapse_ws: txt = re.sub(r"\s+", " ", txt)
+    return txt
+
+def extract_page_range(pdf_path, start, end):
+    # 워커마다 자체 문서 핸들을 연다 (fitz.Document는 프로세스 간 공유 불가)
+    doc = fitz.open(pdf_path)
+    pages = [doc[pno].get_text("text") for pno in range(start, end)]
+    doc.close()
+    return pages
+
+def extract_pages(pdf_path, workers=1):
+    doc = fitz.open(pdf_path)
+    n_pages = len(doc)
+    if workers <= 1 or n_pages < 2:
+        pages = [p.get_text("text") for p in doc]
+        doc.close()
+        return pages
+    doc.close()
+
+    # 워커당 여러 구간으로 잘게 나눠 페이지별 편차를 흡수
+    n_chunks = min(n_pages, workers * 4)
+    bounds = [n_pages * i // n_chunks for i in range(n_chunks + 1)]
+    with ProcessPoolExecutor(max_workers=workers) as ex:
+        parts = ex.map(extract_page_range, [pdf_path] * n_chunks, bounds[:-1], bounds[1:])
+        return [txt for part in parts for txt in part]
+
+def cache_paths(cache_dir, digest, variant):
+    stem = os.path.join(cache_dir, f"{digest}_{variant}")
+    return stem + ".bin", stem + ".idx.json"
+
+def read_cached(cache_dir, digest, variant):
+    """캐시가 있으면 페이지 리스트, 없거나 버전이 다르면 None"""
+    bin_path, idx_path = cache_paths(cache_dir, digest, variant)
+    if not (os.path.exists(bin_path) and os.path.exists(idx_path)):
+        return None
+    with open(idx_path, encoding="utf-8") as f:
+        meta = json.load(f)
+    if meta.get("version") != CACHE_VERSION or meta.get("sha256") != digest:
+        return None
+    offsets = meta["offsets"]
+    if offsets[-1] == 0:
+        return [""] * (len(offsets) - 1)
+    with open(bin_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        return [mm[offsets[i]:offsets[i+1]].decode("utf-8", "surrogatepass") for i in range(len(offsets) - 1)]
+
+def temp_path(cache_dir):
+    fd, path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+    os.close(fd)
+    return path
+
+def write_cached(cache_dir, digest, variant, pages):
+    os.makedirs(cache_dir, exist_ok=True)
+    bin_path, idx_path = cache_paths(cache_dir, digest, variant)
+    # 호출마다 다른 임시 파일에 쓰고 교체 → 중간에 끊기거나 두 프로세스가 동시에 써도 깨진 캐시가 남지 않음
+    bin_tmp, idx_tmp = temp_path(cache_dir), temp_path(cache_dir)
+    try:
+        offsets = [0]
+        with open(bin_tmp, "wb") as f:
+            for txt in pages:
+                b = txt.encode("utf-8", "surrogatepass")
+                f.write(b)
+                offsets.append(offsets[-1] + len(b))
+        with open(idx_tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": CACHE_VERSION, "sha256": digest, "variant": variant,
+                       "offsets": offsets}, f)
+        os.replace(bin_tmp, bin_path)
+        os.replace(idx_tmp, idx_path)
+    finally:
+        for tmp in (bin_tmp, idx_tmp):
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+def load_pages(pdf_path, lower=False, collapse_ws=False, cache_dir=None, workers=1):
+    """
+    PDF 페이지 텍스트 리스트(0-based)를 반환.
+    cache_dir가 None이면 디스크 캐시 없이 추출한다(프로세스 안 재사용은 동일). workers는 추출이 필요할 때만 쓰인다.
+    같은 프로세스에서 다시 부르면 같은 리스트를 돌려주므로 호출측에서 수정하면 안 된다.
+    """
+    ident = pdf_key(pdf_path)
+    variant = variant_name(lower, collapse_ws)
+    variants = remember(PAGES_CACHE, ident, PAGES_CACHE.pop(ident, None) or {}, PAGES_CACHE_SIZE)
+    pages = variants.get(variant)
+    if pages is not None:
+        count("pdf_memory.hit")
+        return pages
+    pages = read_pages(pdf_path, variants, variant, lower, collapse_ws, cache_dir, workers)
+    variants[variant] = pages
+    return pages
+
+def read_pages(pdf_path, variants, variant, lower, collapse_ws, cache_dir, workers):
+    raw = variants.get("raw")
+    if cache_dir is None:
+        if raw is None:
+            with timer("pdf.extract"):
+                raw = extract_pages(pdf_path, workers)
+            count("pdf.pages_extracted", len(raw))
+            variants["raw"] = raw
+        return raw if variant == "raw" else [normalize_page(t, lower, collapse_ws) for t in raw]
+
+    digest = file_sha256(pdf_path)
+    pages = read_cached(cache_dir, digest, variant)
+    if pages is not None:
+        count("pdf_cache.hit")
+        return pages
+    count("pdf_cache.miss")
+
+    if raw is None:
+        raw = read_cached(cache_dir, digest, "raw")
+    if raw is None:
+        with timer("pdf.extract"):
+            raw = extract_pages(pdf_path, workers)
+        count("pdf.pages_extracted", len(raw))
+        write_cached(cache_dir, digest, "raw", raw)
+    elif variant == "raw":
+        # 디스크 캐시 없이 추출해 둔 raw만 메모리에 있던 경우
+        write_cached(cache_dir, digest, "raw", raw)
+    variants["raw"] = raw
+    if variant == "raw":
+        return raw
+    pages = [normalize_page(t, lower, collapse_ws) for t in raw]
+    write_cached(cache_dir, digest, variant, pages)
+    return pages
@@ -0,0 +1,263 @@
+# -*- coding: utf-8 -*-
+"""
+PharmaLex Sentinel 통합 CLI — 단계별 스크립트를 한 프로세스 안에서 호출
+
+  python pharmalex.py <명령> [옵션]
+
+명령:
+  scan           엑셀 � 전수 리포트 (invalid_char_report.csv)
+  build-mapping  PDF 역검색 � 교정 후보표 (build_mapping_from_pdf)
+  autofix        후보표 기반 � 자동 교정 (auto_fffd_apply)
+  normalize      mapping.csv 적용 + 단위 정규화 (archive/development/sentinel_pipeline)
+  ocr-scan       PDF 단위/기호 깨짐 스캔 (archive/development/scan_ocr_units)
+  run-all        단계 그래프(stage_graph.py)로 전체 실행 — 입력이 그대로인 단계는 건너뜀
+                   ocr-scan ─────────────────────────────────────┐
+                   build-mapping → autofix(_autofixed) → autofix-v2(_v2) → normalize
+                 (ocr-scan과 build-mapping은 서로 독립이라 동시에 실행, --serial이면 순서대로)
+                 autofix → autofix-v2 → normalize 사이 엑셀은 Parquet 묶음(*.parquet/)으로 넘기고
+                 xlsx는 최종 산출물(normalize의 _normalized.xlsx)만 저장 (--patch면 단계 간에도 xlsx)
+
+공통 옵션 (모든 명령):
+  --base DIR     data/·out/ 기준 폴더 (기본: 환경변수 PHARMALEX_BASE, 없으면 현재 폴더)
+  --xlsx / --pdf / --mapping   입력 경로 (기본: <base>/data/ 아래 기존 파일명)
+  --out DIR      산출물 폴더 (기본: <base>/out) — 각 스크립트의 out/ 아래 경로를 그대로 옮김
+
+- 각 스크립트의 경로 상수를 바꿔 끼운 뒤 run(args)를 부른다 (스크립트 단독 실행과 같은 코드 경로)
+- 엑셀(workbook_io)·PDF 페이지/해시(pdf_text_cache)는 프로세스 안에서 한 번만 파싱해 단계 간 재사용
+  (run-all에서 ocr-scan·build-mapping을 동시에 돌릴 때도 PDF는 부모 프로세스에서 먼저 한 번만 추출)
+- 명령별 세부 옵션(--full, --patch, --sweep, --jobs, --workers, --profile 등)은 각 스크립트와 같음
+  run-all: --jobs N 이 PDF 추출·후보 점수 계산 프로세스 수를 함께 정함
+           --force 면 서명과 관계없이 전 단계 실행, --full 은 --force + 각 단계 증분 재사용도 끔
+           상태: <out>/.dag/run_all.json
+"""
+
+import os, sys, ast, argparse, importlib.util
+from functools import partial
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, ROOT)
+import build_mapping_from_pdf
+import auto_fffd_apply
+from run_metrics import reset_metrics
+from run_profile import add_profile_args, profiled
+from rule_pack import RULES_PATH
+from workbook_io import intermediate_path
+from pdf_text_cache import load_pages
+from stage_graph import run_graph
+
+XLSX_NAME = "요양심사약제_후처리.xlsx"
+PDF_NAME = "요양급여의 적용기준 및방법에 관한 세부사항(약제).pdf"
+MAPPING_NAME = "mapping.csv"
+DAG_STATE = os.path.join(".dag", "run_all.json")   # <out> 기준
+
+# run-all의 autofix 1차(원본 → _autofixed) 로그/지문; 2차(autofix-v2)는 auto_fffd_apply 기본 경로(_v2)
+AUTOFIX_PASS1 = {
+    "OUT_LOG": "fffd_autofix_log.csv",
+    "FP_STORE": os.path.join(".fingerprints", "auto_fffd_apply_pass1.pkl"),
+    "INC_REPORT": "fffd_autofix_incremental_report_pass1.csv",
+}
+# run-all 단계 간 엑셀(autofix → autofix-v2 → normalize) 이름 — 최종 산출물은 normalize의 xlsx
+PASS1_STEM = "요양심사약제_후처리_fffd_autofixed"
+PASS2_STEM = "요양심사약제_후처리_fffd_autofixed_v2"
+
+def load_script(name, rel_path):
+    # archive/ 스크립트는 패키지가 아니므로 파일 경로로 로드
+    spec = importlib.util.spec_from_file_location(name, os.path.join(ROOT, rel_path))
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
+
+sentinel_pipeline = load_script("sentinel_pipeline", os.path.join("archive", "development", "sentinel_pipeline.py"))
+scan_ocr_units = load_script("scan_ocr_units", os.path.join("archive", "development", "scan_ocr_units.py"))
+
+# 모듈 이름 → 처음 불러왔을 때의 문자열 상수 (다시 configure할 때 앞 단계에서 바꾼 값을 되돌림)
+DEFAULT_PATHS = {}
+
+def relocate_outputs(module, out_dir):
+    """
+    모듈의 문자열 상수(대문자 이름)를 기본값으로 되돌린 뒤,
+    기본 OUT_DIR 아래를 가리키는 것은 out_dir 아래 같은 상대 경로로 옮김
+    """
+    defaults = DEFAULT_PATHS.setdefault(module.__name__, {
+        name: value for name, value in vars(module).items() if name.isupper() and isinstance(value, str)})
+    old = os.path.normpath(defaults["OUT_DIR"])
+    for name, value in defaults.items():
+        path = os.path.normpath(value)
+        if path == old or path.startswith(old + os.sep):
+            value = os.path.normpath(os.path.join(out_dir, os.path.relpath(path, old)))
+        setattr(module, name, value)
+
+def resolve_paths(args):
+    base = args.base or os.environ.get("PHARMALEX_BASE") or os.getcwd()
+    return {
+        "xlsx": args.xlsx or os.path.join(base, "data", XLSX_NAME),
+        "pdf": args.pdf or os.path.join(base, "data", PDF_NAME),
+        "mapping": args.mapping or os.path.join(base, "data", MAPPING_NAME),
+        "out": args.out or os.path.join(base, "out"),
+    }
+
+def configure(paths):
+    """경로 dict(resolve_paths) → 네 스크립트의 입력/출력 상수"""
+    out = paths["out"]
+    os.makedirs(out, exist_ok=True)
+    for module in (build_mapping_from_pdf, auto_fffd_apply, sentinel_pipeline, scan_ocr_units):
+        relocate_outputs(module, out)
+    b = build_mapping_from_pdf
+    b.IN_XLSX, b.IN_PDF, b.FINAL_MAP = paths["xlsx"], paths["pdf"], paths["mapping"]
+    a = auto_fffd_apply
+    a.IN_XLSX, a.IN_CAND = paths["xlsx"], b.CAND_CSV
+    p = sentinel_pipeline
+    p.IN_XLSX, p.MAPPING_CSV, p.OCR_CSV = paths["xlsx"], paths["mapping"], scan_ocr_units.OUT_CSV
+    scan_ocr_units.PDF_PATH = paths["pdf"]
+
+def cmd_scan(args, paths):
+    p = sentinel_pipeline
+    cnt = p.scan_invalid_chars(paths["xlsx"], p.REPORT_INVALID)
+    print(f"[scan] � 셀 {cnt}개 -> {p.REPORT_INVALID}")
+
+STAGE_MODULES = {
+    "ocr-scan": scan_ocr_units,
+    "build-mapping": build_mapping_from_pdf,
+    "autofix": auto_fffd_apply,
+    "autofix-v2": auto_fffd_apply,
+    "normalize": sentinel_pipeline,
+}
+
+def run_stage(paths, name, argv, settings):
+    """run-all 단계 하나 (stage_graph가 현재 프로세스 또는 워커 프로세스에서 호출)"""
+    configure(paths)
+    module = STAGE_MODULES[name]
+    for attr, value in settings.items():
+        setattr(module, attr, value)
+    print(f"\n===== {name} =====")
+    reset_metrics()   # 단계별 지표 파일이 앞 단계 값을 포함하지 않도록
+    module.run(module.parse_args(argv))
+
+def handoff_path(out, stem, patch):
+    """
+    run-all 단계 간 엑셀 경로 — 기본은 Parquet 묶음(workbook_io.intermediate_path, pyarrow 없으면 xlsx)
+    --patch면 원본 xlsx의 바뀐 셀만 고쳐 쓰므로 xlsx 그대로
+    """
+    return os.path.join(out, stem + ".xlsx") if patch else intermediate_path(out, stem)
+
+def local_sources(path, seen=None):
+    """스크립트 + 그 스크립트가 (재귀적으로) import하는 저장소 안 모듈의 소스 경로 (표준/서드파티 제외)"""
+    seen = [] if seen is None else seen
+    path = os.path.abspath(path)
+    if path in seen:
+        return seen
+    seen.append(path)
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), path)
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            names = [node.module]
+        else:
+            continue
+        for name in names:
+            # 같은 폴더 모듈이 먼저, 없으면 저장소 루트 공용 모듈
+            for folder in (os.path.dirname(path), ROOT):
+                candidate = os.path.join(folder, name.split(".")[0] + ".py")
+                if os.path.isfile(candidate):
+                    local_sources(candidate, seen)
+                    break
+    return seen
+
+def warm_pdf(paths, workers):
+    """ocr-scan·build-mapping이 같은 차례에 돌 때 PDF 페이지를 부모 프로세스에서 한 번만 추출/로딩"""
+    load_pages(paths["pdf"], cache_dir=build_mapping_from_pdf.PDF_CACHE_DIR, workers=workers)
+
+def pipeline_stages(args, paths):
+    """run-all 단계 선언 (입력/출력 경로는 configure 이후 각 모듈 상수 기준)"""
+    b, a, p, o = build_mapping_from_pdf, auto_fffd_apply, sentinel_pipeline, scan_ocr_units
+    out = paths["out"]
+    pass1 = handoff_path(out, PASS1_STEM, args.patch)
+    pass2 = handoff_path(out, PASS2_STEM, args.patch)
+    pass1_log = os.path.join(out, AUTOFIX_PASS1["OUT_LOG"])
+    full = ["--full"] if args.full else []
+    patch = ["--patch"] if args.patch else []
+    warm = partial(warm_pdf, paths, args.jobs)
+
+    def stage(name, inputs, outputs, argv, config=(), settings=None, prepare=None):
+        # 스크립트와 그것이 쓰는 공용 모듈(workbook_io, rule_engine 등) 소스, 단계 인자를 정하는
+        # 이 파일, 규칙 팩도 입력으로 — 코드/규칙이 바뀌면 다시 실행
+        sources = local_sources(STAGE_MODULES[name].__file__) + [os.path.abspath(__file__)]
+        return {"name": name, "inputs": inputs + sources + [RULES_PATH], "outputs": outputs,
+                "config": (name,) + tuple(config),
+                "run": partial(run_stage, paths, name, argv, settings or {}), "prepare": prepare}
+
+    pass1_settings = {attr: os.path.join(out, rel) for attr, rel in AUTOFIX_PASS1.items()}
+    pass1_settings["OUT_XLSX"] = pass1
+    return [
+        stage("ocr-scan", [paths["pdf"]], [o.OUT_CSV], ["--workers", str(args.jobs)], prepare=warm),
+        stage("build-mapping", [paths["xlsx"], paths["pdf"]], [b.CAND_CSV],
+              ["--jobs", str(args.jobs), "--workers", str(args.jobs)] + full, prepare=warm),
+        stage("autofix", [paths["xlsx"], b.CAND_CSV], [pass1, pass1_log], full + patch, patch,
+              settings=pass1_settings),
+        stage("autofix-v2", [pass1, b.CAND_CSV], [pass2, a.OUT_LOG], full + patch, patch,
+              settings={"IN_XLSX": pass1, "OUT_XLSX": pass2}),
+        stage("normalize", [pass2, paths["mapping"], o.OUT_CSV],
+              [p.NORM_XLSX, p.LOG_CSV, p.REPORT_INVALID], full, settings={"IN_XLSX": pass2}),
+    ]
+
+def cmd_run_all(args, paths):
+    status = run_graph(pipeline_stages(args, paths), os.path.join(paths["out"], DAG_STATE),
+                       force=args.force or args.full, parallel=not args.serial)
+    print("\n[DAG] " + ", ".join(f"{k}={v}" for k, v in status.items()))
+    if any(v in ("failed", "blocked") for v in status.values()):
+        sys.exit(1)
+
+COMMANDS = {
+    "scan": ("엑셀 � 전수 리포트", None),
+    "build-mapping": ("PDF 역검색 � 교정 후보표", build_mapping_from_pdf),
+    "autofix": ("후보표 기반 � 자동 교정", auto_fffd_apply),
+    "normalize": ("mapping.csv 적용 + 단위 정규화", sentinel_pipeline),
+    "ocr-scan": ("PDF 단위/기호 깨짐 스캔", scan_ocr_units),
+    "run-all": ("전체 단계 그래프 실행 (바뀐 입력이 있는 단계만)", None),
+}
+
+def parse_args(argv=None):
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--base", help="data/·out/ 기준 폴더 (기본: PHARMALEX_BASE 또는 현재 폴더)")
+    common.add_argument("--xlsx", help="입력 엑셀 (기본: <base>/data/" + XLSX_NAME + ")")
+    common.add_argument("--pdf", help="참조 PDF (기본: <base>/data/" + PDF_NAME + ")")
+    common.add_argument("--mapping", help="mapping.csv (기본: <base>/data/mapping.csv)")
+    common.add_argument("--out", help="산출물 폴더 (기본: <base>/out)")
+
+    ap = argparse.ArgumentParser(description="PharmaLex Sentinel 통합 CLI")
+    sub = ap.add_subparsers(dest="command", required=True)
+    for name, (help_text, module) in COMMANDS.items():
+        sp = sub.add_parser(name, parents=[common], help=help_text, description=help_text)
+        if module is not None:
+            module.add_arguments(sp)
+        else:
+            add_profile_args(sp)
+        if name == "run-all":
+            sp.add_argument("--jobs", type=int, default=1,
+                            help="PDF 추출·후보 점수 계산 프로세스 수 (1이면 직렬)")
+            sp.add_argument("--full", action="store_true",
+                            help="모든 단계를 다시 실행하고 각 단계의 증분 재사용도 끔")
+            sp.add_argument("--force", action="store_true",
+                            help="입력이 그대로여도 모든 단계 실행 (단계 안 증분 재사용은 유지)")
+            sp.add_argument("--serial", action="store_true",
+                            help="독립 단계도 현재 프로세스에서 순서대로 실행")
+            sp.add_argument("--patch", action="store_true", help="autofix를 --patch(바뀐 셀만 수정)로")
+    return ap.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    paths = resolve_paths(args)
+    configure(paths)
+    module = COMMANDS[args.command][1]
+    with profiled(paths["out"], "pharmalex-" + args.command, args.profile, args.profile_memory, args.profile_top):
+        if args.command == "scan":
+            cmd_scan(args, paths)
+        elif args.command == "run-all":
+            cmd_run_all(args, paths)
+        else:
+            module.run(args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+"""
+치환 규칙 묶음을 하나의 정규식으로 합쳐 셀을 한 번만 훑는 규칙 엔진
+
+- 규칙: [(compiled_regex, replacement_template), ...]  (auto_fffd_apply.HEURISTICS 형식)
+- compile_rules: 규칙마다 (?P<r0>...)|(?P<r1>...)|... 로 감싸 단일 정규식 생성
+  · 규칙별 플래그(IGNORECASE 등)는 (?i:...) 범위 플래그로 보존
+  · 치환 템플릿의 \\1, \\g<1> 은 합쳐진 정규식의 그룹 번호로 옮김
+  · 합치면 뜻이 바뀌는 패턴은 거부 (combine_errors — rule_pack.validate_rule_pack에서도 검사):
+    패턴 안의 번호 역참조(\\1, (?(1)...)), 감싸기 그룹과 겹치는 이름(r0, r1, ...), 전역 인라인 플래그((?i) 등)
+- apply_rules: 한 번의 sub로 치환 + 규칙별 적용 횟수를 순차 subn 방식과 같은 로그 문자열로 반환
+  · 같은 위치에서는 앞 규칙이 우선 (규칙 순서 = 우선순위)
+  · 순차 subn과 다른 경우: 서로 다른 규칙의 매칭이 겹치거나, 앞 규칙의 치환 결과가 뒤 규칙의
+    \b 등 주변 문맥 판정을 바꾸는 경우 (단일 스캔은 항상 원문 기준으로 판정)
+- compile_literal_map / apply_literal_map: mapping.csv 같은 리터럴 (before, after) 쌍 전체를
+  한 번에 적용 (str.replace 연쇄 대체)
+  · before가 모두 한 글자면 str.translate 표, 아니면 긴 before 우선 정규식 1개 (접두사 트리 모양)
+  · 같은 before가 여러 번 나오면 첫 쌍 우선, 빈 before는 무시
+  · 순차 replace와 달리 치환 결과를 다시 치환하지 않음 (원문 기준 한 번)
+  · apply_literal_map_many: 컬럼 전체를 구분자로 이어 붙여 한 번에 치환
+"""
+
+import re
+
+FLAG_LETTERS = [(re.IGNORECASE, "i"), (re.MULTILINE, "m"), (re.DOTALL, "s"), (re.VERBOSE, "x")]
+TEMPLATE_GROUP_RE = re.compile(r"\\(?:g<(\d+)>|(\d+))")
+RESERVED_GROUP_NAME_RE = re.compile(r"r\d+")
+# "(?" 뒤 그룹 머리: 전역 플래그 (?aiLmsux) / 이름 그룹 (?P<name> / 이름 역참조 (?P=name) / 조건 (?(ref)
+GROUP_HEAD_RE = re.compile(r"\(\?(?:(?P<flags>[aiLmsux]+)\)|P<(?P<name>\w+)>|P=(?P<ref>\w+)\)|\((?P<cond>\w+)\))")
+OCTAL_DIGITS = "01234567"
+
+def combine_errors(pattern):
+    """
+    compile_rules로 합칠 때 뜻이 바뀌는 패턴 요소 → 오류 메시지 리스트 (비어 있으면 합쳐도 같은 매칭)
+    - 번호 역참조(\\1, (?(1)...)): 합쳐진 정규식에서는 그룹 번호가 밀려 다른 그룹을 가리킴
+    - 이름 r<숫자> 그룹/역참조: 규칙 감싸기 그룹 이름과 충돌
+    - 전역 인라인 플래그((?i) 등): 감싼 정규식 중간에 올 수 없음 → 규칙 flags로 지정
+    """
+    errors = []
+    i, n, in_class = 0, len(pattern), False
+    while i < n:
+        ch = pattern[i]
+        if ch == "\\":
+            digits = pattern[i+1:i+4]
+            # \\0.. 과 세 자리 8진수(\\123)는 문자 이스케이프, 나머지 \\1~\\99는 그룹 역참조
+            octal = digits[:1] == "0" or (len(digits) == 3 and all(d in OCTAL_DIGITS for d in digits))
+            if not in_class and digits[:1].isdigit() and not octal:
+                ref = digits[:2] if digits[1:2].isdigit() else digits[:1]
+                errors.append(f"번호 역참조 \\{ref}는 합쳐진 정규식에서 다른 그룹을 가리킴 (이름 그룹 (?P<..>)/(?P=..)로)")
+            i += 2
+            continue
+        if in_class:
+            in_class = ch != "]"
+            i += 1
+            continue
+        if ch == "[":
+            # 맨 앞 ^ 와 바로 뒤 ] 는 문자 집합의 일부
+            i += 2 if pattern.startswith("[^", i) else 1
+            i += 1 if pattern.startswith("]", i) else 0
+            in_class = True
+            continue
+        m = GROUP_HEAD_RE.match(pattern, i) if pattern.startswith("(?", i) else None
+        if m:
+            name = m.group("name") or m.group("ref") or m.group("cond")
+            if m.group("flags"):
+                errors.append(f"전역 인라인 플래그 {m.group(0)}는 합칠 수 없음 (규칙 flags 또는 (?{m.group('flags')}:...)로)")
+            elif m.group("cond") and name.isdigit():
+                errors.append(f"조건 그룹 번호 참조 {m.group(0)}는 합쳐진 정규식에서 다른 그룹을 가리킴")
+            elif name and RESERVED_GROUP_NAME_RE.fullmatch(name):
+                errors.append(f"그룹 이름 {name!r}는 규칙 감싸기 그룹(r0, r1, ...)용으로 예약됨")
+        i += 1
+    return errors
+
+def shift_template(template, offset):
+    # \N, \g<N> → \g<N+offset>
+    return TEMPLATE_GROUP_RE.sub(lambda m: f"\\g<{int(m.group(1) or m.group(2)) + offset}>", template)
+
+def compile_rules(rules):
+    """
+    반환: (combined_regex, {바깥 그룹 번호: 규칙 인덱스}, [(pattern_text, repl, shifted_template), ...])
+    규칙 순서 유지
+    """
+    parts, specs = [], []
+    group_no = 0
+    for i, (pat, repl) in enumerate(rules):
+        rgx = pat if isinstance(pat, re.Pattern) else re.compile(pat)
+        errors = combine_errors(rgx.pattern)
+        refs = [int(m.group(1) or m.group(2)) for m in TEMPLATE_GROUP_RE.finditer(repl)]
+        if any(r > rgx.groups for r in refs):
+            # 순차 sub에서는 오류, 합치면 다음 규칙의 그룹을 조용히 가리킴
+            errors.append(f"치환 템플릿 {repl!r}이 없는 그룹을 참조 (그룹 {rgx.groups}개)")
+        if errors:
+            raise ValueError(f"규칙 {i} ({rgx.pattern!r}): " + "; ".join(errors))
+        flags = "".join(ch for fl, ch in FLAG_LETTERS if rgx.flags & fl)
+        body = f"(?{flags}:{rgx.pattern})" if flags else f"(?:{rgx.pattern})"
+        parts.append(f"(?P<r{i}>{body})")
+        group_no += 1  # 바깥 규칙 그룹
+        specs.append((group_no, rgx.pattern, repl, shift_template(repl, group_no)))
+        group_no += rgx.groups
+    combined = re.compile("|".join(parts))
+    # 바깥 그룹 번호 → 규칙 인덱스
+    owner = {g: i for i, (g, _, _, _) in enumerate(specs)}
+    return combined, owner, [(p, r, t) for _, p, r, t in specs]
+
+def apply_rules(engine, text):
+    """
+    반환: (치환 결과, ["<pattern> -> <repl> x<n>", ...])
+    """
+    combined, owner, specs = engine
+    counts = [0] * len(specs)
+
+    def dispatch(m):
+        # 바깥 규칙 그룹이 마지막으로 닫히므로 lastindex가 곧 규칙 그룹 번호
+        i = owner[m.lastindex]
+        counts[i] += 1
+        return m.expand(specs[i][2])
+
+    new = combined.sub(dispatch, text)
+    applied = [f"{p} -> {r} x{n}" for (p, r, _), n in zip(specs, counts) if n > 0]
+    return new, applied
+
+def trie_pattern(words):
+    """
+    리터럴 목록 → 접두사 트리 모양 정규식 (각 위치에서 다음 글자로 가지가 하나로 정해짐)
+    연속 가지를 탐욕적으로 먼저 시도하므로 '긴 것 우선' alternation과 같은 매칭
+    """
+    trie = {}
+    for w in words:
+        node = trie
+        for ch in w:
+            node = node.setdefault(ch, {})
+        node[""] = True
+
+    def build(node):
+        ends = "" in node
+        alts = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not alts:
+            return ""
+        body = alts[0] if len(alts) == 1 and not ends else "(?:" + "|".join(alts) + ")"
+        return body + "?" if ends else body
+
+    return build(trie)
+
+def compile_literal_map(pairs):
+    """
+    반환: ("translate", str.maketrans 표) 또는 ("regex", combined_regex, {before: after}) 또는 None(쌍 없음)
+    """
+    table = {}
+    for before, after in pairs:
+        if before and before not in table:
+            table[before] = after
+    if not table:
+        return None
+    if all(len(b) == 1 for b in table):
+        return ("translate", str.maketrans(table))
+    return ("regex", re.compile(trie_pattern(table)), table)
+
+def apply_literal_map(engine, text):
+    if engine is None:
+        return text
+    if engine[0] == "translate":
+        return text.translate(engine[1])
+    _, rgx, table = engine
+    return rgx.sub(lambda m: table[m.group(0)], text)
+
+def apply_literal_map_many(engine, texts, sep="\x00"):
+    """
+    문자열 리스트 전체에 apply_literal_map — 구분자로 이어 붙여 정규식/translate를 C 수준에서 한 번만 돌림
+    (before/after나 값에 구분자가 들어 있으면 셀 단위로)
+    """
+    texts = list(texts)
+    if engine is None or not texts:
+        return texts
+    keys = engine[1] if engine[0] == "translate" else engine[2]
+    joined = sep.join(texts)
+    if (any(sep in (chr(k) if isinstance(k, int) else k) for k in keys)
+            or joined.count(sep) != len(texts) - 1):
+        return [apply_literal_map(engine, t) for t in texts]
+    out = apply_literal_map(engine, joined).split(sep)
+    if len(out) != len(texts):  # after에 구분자가 섞여 들어간 경우
+        return [apply_literal_map(engine, t) for t in texts]
+    return out
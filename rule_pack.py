@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+"""
+규칙 팩(rules/pharmalex_rules.toml) 로더 — 모든 단계 공용
+
+- TOML 파싱 + 검증(정규식 컴파일 확인) 결과를 파일 SHA-256 기준으로 디스크에 피클 캐시
+    <사용자 캐시 폴더>/pharmalex/rules/<파일명>.<경로 해시 8자>.<sha256 앞 16자>.pkl
+    (환경변수 PHARMALEX_CACHE_DIR > LOCALAPPDATA(Windows) > XDG_CACHE_HOME > ~/.cache — 소스 트리에는 쓰지 않음)
+  → 규칙 파일이 그대로면 다음 실행부터 TOML 파싱/검증을 건너뜀
+  · 새 해시를 저장할 때 같은 규칙 파일의 이전 해시 캐시는 지움 / 캐시 폴더에 쓸 수 없으면 캐시 없이 진행
+- 정규식 객체 자체는 직렬화해도 로드 시 다시 컴파일되므로(re.Pattern 피클 특성)
+  컴파일은 프로세스당 한 번만 하고 (경로, 해시) 기준으로 메모이즈
+  · 캐시 미스 때는 검증하며 컴파일한 정규식을 그대로 재사용
+- 반환(load_rule_pack):
+    pack        : {"name", "version", "sha256"}
+    heuristics  : [(re.Pattern, repl), ...]        + heuristics_engine (rule_engine.compile_rules)
+    normalize   : gram_suspect_threshold, ascii_micro_re, g_value_re, form_keywords, lab_neg_patterns,
+                  form_re / lab_re (keyword_matcher 단일 스캔 매처),
+                  prefilter_re (없으면 None), units_engine (unit_normalizer 단일 스캔 엔진)
+    ocr_scan    : gram_suspect_threshold, form_hints, form_hints_re, patterns{이름: re.Pattern}, greek_mis_ocr{...}
+"""
+
+import os, re, glob, pickle, hashlib
+
+try:
+    import tomllib  # Python 3.11+
+except ImportError:  # pragma: no cover
+    import tomli as tomllib
+
+from rule_engine import compile_rules, combine_errors
+from keyword_matcher import compile_keywords, compile_any
+from unit_normalizer import compile_unit_rules
+
+RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "rules", "pharmalex_rules.toml")
+USER_CACHE_DIR = (os.environ.get("PHARMALEX_CACHE_DIR")
+                  or os.path.join(os.environ.get("LOCALAPPDATA") or os.environ.get("XDG_CACHE_HOME")
+                                  or os.path.join(os.path.expanduser("~"), ".cache"), "pharmalex"))
+RULES_CACHE_DIR = os.path.join(USER_CACHE_DIR, "rules")
+PACK_CACHE_VERSION = 3
+
+FLAG_MAP = {"i": re.IGNORECASE, "m": re.MULTILINE, "s": re.DOTALL, "x": re.VERBOSE}
+
+# (절대경로, sha256) → 컴파일된 규칙 팩
+PACK_MEMO = {}
+
+def parse_flags(letters: str) -> int:
+    flags = 0
+    for ch in letters or "":
+        if ch not in FLAG_MAP:
+            raise ValueError(f"알 수 없는 정규식 플래그: {ch!r}")
+        flags |= FLAG_MAP[ch]
+    return flags
+
+def regex_spec(where: str, spec, compiled=None) -> dict:
+    """
+    {pattern, flags} 검증 후 평문 dict로 (컴파일 가능 여부까지 확인)
+    compiled가 있으면 {(pattern, flags): re.Pattern}에 컴파일 결과를 모아 compile_rule_pack이 재사용
+    """
+    if isinstance(spec, str):
+        spec = {"pattern": spec}
+    if "pattern" not in spec:
+        raise ValueError(f"[{where}] pattern 누락")
+    out = {"pattern": spec["pattern"], "flags": parse_flags(spec.get("flags", ""))}
+    try:
+        rgx = re.compile(out["pattern"], out["flags"])
+    except re.error as e:
+        raise ValueError(f"[{where}] 정규식 오류: {e}") from e
+    if compiled is not None:
+        compiled[(out["pattern"], out["flags"])] = rgx
+    return out
+
+def combinable_spec(where: str, spec, compiled=None) -> dict:
+    """regex_spec + rule_engine.compile_rules로 합쳐도 같은 뜻인지 확인 (heuristics, ascii_micro/g_value)"""
+    out = regex_spec(where, spec, compiled)
+    errors = combine_errors(out["pattern"])
+    if errors:
+        raise ValueError(f"[{where}] 단일 정규식으로 합칠 수 없음: " + "; ".join(errors))
+    return out
+
+def check_combined(where: str, specs, repls, compiled):
+    # 규칙 간 충돌(같은 그룹 이름 등)은 합친 정규식을 실제로 컴파일해야 드러남
+    try:
+        compile_rules([(compiled[(s["pattern"], s["flags"])], r) for s, r in zip(specs, repls)])
+    except (ValueError, re.error) as e:
+        raise ValueError(f"[{where}] 단일 정규식으로 합칠 수 없음: {e}") from e
+
+def validate_rule_pack(raw: dict, compiled=None) -> dict:
+    """TOML 원본 → 검증된 평문 구조 (피클 캐시 대상). compiled: regex_spec 참고"""
+    compiled = {} if compiled is None else compiled
+    for sec in ("pack", "heuristics", "normalize", "ocr_scan"):
+        if sec not in raw:
+            raise ValueError(f"규칙 팩에 [{sec}] 섹션이 없습니다")
+    norm, ocr = raw["normalize"], raw["ocr_scan"]
+    heuristics = []
+    for i, h in enumerate(raw["heuristics"]):
+        spec = combinable_spec(f"heuristics[{i}]", h, compiled)
+        spec["repl"] = h.get("repl", "")
+        heuristics.append(spec)
+    check_combined("heuristics", heuristics, [h["repl"] for h in heuristics], compiled)
+    units = [combinable_spec("normalize.ascii_micro", norm["ascii_micro"], compiled),
+             combinable_spec("normalize.g_value", norm["g_value"], compiled)]
+    check_combined("normalize.ascii_micro + g_value", units, ["", ""], compiled)
+    return {
+        "pack": {"name": raw["pack"].get("name", ""), "version": str(raw["pack"].get("version", ""))},
+        "heuristics": heuristics,
+        "normalize": {
+            "gram_suspect_threshold": float(norm["gram_suspect_threshold"]),
+            "ascii_micro": units[0],
+            "g_value": units[1],
+            "prefilter": (regex_spec("normalize.prefilter", norm["prefilter"], compiled)
+                          if "prefilter" in norm else None),
+            "form_keywords": list(norm["form_keywords"]),
+            "lab_neg_patterns": [regex_spec("normalize.lab_neg_patterns", p)["pattern"]
+                                 for p in norm["lab_neg_patterns"]],
+        },
+        "ocr_scan": {
+            "gram_suspect_threshold": ocr["gram_suspect_threshold"],
+            "form_hints": list(ocr["form_hints"]),
+            "patterns": {k: regex_spec(f"ocr_scan.patterns.{k}", v, compiled) for k, v in ocr["patterns"].items()},
+            "greek_mis_ocr": {k: regex_spec(f"ocr_scan.greek_mis_ocr.{k}", v, compiled)
+                              for k, v in ocr["greek_mis_ocr"].items()},
+        },
+    }
+
+def cache_prefix(cache_dir: str, path: str) -> str:
+    # 같은 파일명이라도 다른 위치의 규칙 팩은 따로 캐시 (이전 해시 정리 때 서로 지우지 않도록)
+    where = hashlib.sha256(os.path.abspath(path).encode("utf-8", "surrogatepass")).hexdigest()[:8]
+    return os.path.join(cache_dir, f"{os.path.basename(path)}.{where}")
+
+def cache_file(cache_dir: str, path: str, digest: str) -> str:
+    return f"{cache_prefix(cache_dir, path)}.{digest[:16]}.pkl"
+
+def save_pack_cache(cache_dir: str, path: str, digest: str, data: dict):
+    """캐시 저장 + 같은 규칙 파일의 이전 해시 캐시 정리 (쓸 수 없으면 건너뜀)"""
+    cache_path = cache_file(cache_dir, path, digest)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump({"version": PACK_CACHE_VERSION, "sha256": digest, "data": data}, f,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, cache_path)
+        for old in glob.glob(glob.escape(cache_prefix(cache_dir, path)) + ".*.pkl"):
+            if old != cache_path:
+                os.remove(old)
+    except OSError as e:
+        print(f"[WARN] 규칙 팩 캐시 저장 안 함 ({cache_dir}): {e}")
+
+def load_rule_pack_data(path: str, digest: str, cache_dir=RULES_CACHE_DIR):
+    """반환: (검증된 평문 구조, 검증 중 컴파일한 정규식 {(pattern, flags): re.Pattern} — 캐시 적중이면 빈 dict)"""
+    if cache_dir:
+        cache_path = cache_file(cache_dir, path, digest)
+        if os.path.exists(cache_path):
+            with open(cache_path, "rb") as f:
+                cached = pickle.load(f)
+            if cached.get("version") == PACK_CACHE_VERSION and cached.get("sha256") == digest:
+                return cached["data"], {}
+
+    compiled = {}
+    with open(path, "rb") as f:
+        data = validate_rule_pack(tomllib.load(f), compiled)
+    if cache_dir:
+        save_pack_cache(cache_dir, path, digest, data)
+    return data, compiled
+
+def compile_rule_pack(data: dict, digest: str, compiled=None) -> dict:
+    compiled = {} if compiled is None else compiled
+
+    def rx(spec):
+        key = (spec["pattern"], spec["flags"])
+        if key not in compiled:
+            compiled[key] = re.compile(*key)
+        return compiled[key]
+    heuristics = [(rx(h), h["repl"]) for h in data["heuristics"]]
+    norm, ocr = data["normalize"], data["ocr_scan"]
+    return {
+        "pack": dict(data["pack"], sha256=digest),
+        "heuristics": heuristics,
+        "heuristics_engine": compile_rules(heuristics),
+        "normalize": {
+            "gram_suspect_threshold": norm["gram_suspect_threshold"],
+            "ascii_micro_re": rx(norm["ascii_micro"]),
+            "g_value_re": rx(norm["g_value"]),
+            "prefilter_re": rx(norm["prefilter"]) if norm.get("prefilter") else None,
+            "units_engine": compile_unit_rules(rx(norm["ascii_micro"]), rx(norm["g_value"])),
+            "form_keywords": norm["form_keywords"],
+            "lab_neg_patterns": norm["lab_neg_patterns"],
+            "form_re": compile_keywords(norm["form_keywords"]),
+            "lab_re": compile_any(norm["lab_neg_patterns"], re.IGNORECASE),
+        },
+        "ocr_scan": {
+            "gram_suspect_threshold": ocr["gram_suspect_threshold"],
+            "form_hints": ocr["form_hints"],
+            "form_hints_re": compile_keywords(ocr["form_hints"]),
+            "patterns": {k: rx(v) for k, v in ocr["patterns"].items()},
+            "greek_mis_ocr": {k: rx(v) for k, v in ocr["greek_mis_ocr"].items()},
+        },
+    }
+
+def load_rule_pack(path=None, cache_dir=RULES_CACHE_DIR) -> dict:
+    path = os.path.abspath(path or RULES_PATH)
+    with open(path, "rb") as f:
+        digest = hashlib.sha256(f.read()).hexdigest()
+    key = (path, digest)
+    if key not in PACK_MEMO:
+        data, compiled = load_rule_pack_data(path, digest, cache_dir)
+        PACK_MEMO[key] = compile_rule_pack(data, digest, compiled)
+    return PACK_MEMO[key]
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""
+실행 지표(타이머·카운터) 공용 모듈 — 프로파일러 없이 운영 실행에서 시간이 어디에 쓰이는지 기록
+
+- timer(name): with 블록 시간을 누적 (초, 호출 수)
+- count(name, n=1): 카운터 누적 (셀 수, 정규식 평가 수, 페이지 수, 캐시 적중/미스 등)
+- write_metrics(out_dir, script): out/metrics/<script>-<시각>.json 으로 저장 (실행마다 1개)
+- summary_lines(): summary_report.md 등에 붙일 마크다운 요약 블록
+- 프로세스 단위 전역 상태 — --jobs 병렬 워커 안에서 센 값은 합산되지 않음
+"""
+
+import os, json, time, platform
+import datetime as dt
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+
+STARTED = time.perf_counter()
+STARTED_AT = dt.datetime.now()
+TIMERS = defaultdict(lambda: [0.0, 0])   # 이름 → [누적 초, 호출 수]
+COUNTERS = Counter()
+
+def reset_metrics():
+    global STARTED, STARTED_AT
+    STARTED, STARTED_AT = time.perf_counter(), dt.datetime.now()
+    TIMERS.clear()
+    COUNTERS.clear()
+
+@contextmanager
+def timer(name):
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        slot = TIMERS[name]
+        slot[0] += time.perf_counter() - t0
+        slot[1] += 1
+
+def count(name, n=1):
+    COUNTERS[name] += n
+
+def snapshot() -> dict:
+    return {
+        "wall_seconds": round(time.perf_counter() - STARTED, 4),
+        "timers": {k: {"seconds": round(v[0], 4), "calls": v[1]} for k, v in sorted(TIMERS.items())},
+        "counters": dict(sorted(COUNTERS.items())),
+    }
+
+def write_metrics(out_dir, script, extra=None) -> str:
+    """out_dir/metrics/<script>-<YYYYmmdd-HHMMSS>.json 저장 후 경로 반환"""
+    data = {
+        "script": script,
+        "started_at": STARTED_AT.strftime("%Y-%m-%d %H:%M:%S"),
+        "python": platform.python_version(),
+        **snapshot(),
+    }
+    if extra:
+        data["extra"] = extra
+    metrics_dir = os.path.join(out_dir, "metrics")
+    os.makedirs(metrics_dir, exist_ok=True)
+    path = os.path.join(metrics_dir, f"{script}-{STARTED_AT.strftime('%Y%m%d-%H%M%S')}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    return path
+
+def summary_lines(title="실행 지표") -> list:
+    snap = snapshot()
+    lines = [f"## {title}", f"- 전체 실행 시간: **{snap['wall_seconds']:.2f}s**", ""]
+    if snap["timers"]:
+        lines += ["| 구간 | 누적(초) | 호출 |", "|---|---:|---:|"]
+        lines += [f"| {k} | {v['seconds']:.3f} | {v['calls']} |" for k, v in snap["timers"].items()]
+        lines.append("")
+    if snap["counters"]:
+        lines += ["| 카운터 | 값 |", "|---|---:|"]
+        lines += [f"| {k} | {v} |" for k, v in snap["counters"].items()]
+        lines.append("")
+    return lines
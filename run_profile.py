@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""
+실행 프로파일링 (--profile) — build_mapping_from_pdf / auto_fffd_apply / sentinel_pipeline / scan_ocr_units 공용
+
+- profiled(): 실행 전체를 cProfile로 감싸 out/profile/<script>-<시각>.prof 저장
+  (python -m pstats 또는 snakeviz 등으로 열기)
+- 같은 이름의 .txt: 누적 시간(cumulative)·자체 시간(tottime) 기준 상위 N개 함수
+- memory=True(--profile-memory)면 tracemalloc으로 최대 메모리와 할당 상위 N개 위치를 .txt에 덧붙임
+  (할당 추적 때문에 실행이 눈에 띄게 느려지므로 시간 수치는 따로 보는 것이 좋음)
+- 실행 중 예외가 나도 그때까지의 프로파일은 저장
+- --jobs 병렬 워커 프로세스 안의 시간은 잡히지 않음 (메인 프로세스만)
+"""
+
+import os, io, cProfile, pstats, tracemalloc
+import datetime as dt
+from contextlib import contextmanager
+
+PROFILE_TOP = 40   # 리포트에 남길 상위 함수/할당 위치 수
+
+def add_profile_args(ap):
+    ap.add_argument("--profile", action="store_true",
+                    help="cProfile로 실행을 프로파일링해 out/profile/에 .prof + 상위 함수 리포트 저장")
+    ap.add_argument("--profile-memory", action="store_true",
+                    help="tracemalloc 최대 메모리/할당 상위 위치도 기록 (--profile 포함)")
+    ap.add_argument("--profile-top", type=int, default=PROFILE_TOP,
+                    help="리포트에 남길 상위 함수 수")
+
+def stats_text(prof, sort, top):
+    buf = io.StringIO()
+    pstats.Stats(prof, stream=buf).strip_dirs().sort_stats(sort).print_stats(top)
+    return buf.getvalue()
+
+def memory_text(snapshot, peak, top):
+    lines = [f"최대 메모리(tracemalloc): {peak / 1024 / 1024:.1f} MiB", "",
+             f"할당 상위 {top}개 위치 (실행 종료 시점 기준):"]
+    for stat in snapshot.statistics("lineno")[:top]:
+        lines.append(f"  {stat.size / 1024:10.1f} KiB  {stat.count:8d}회  {stat.traceback}")
+    return "\n".join(lines) + "\n"
+
+def write_profile(out_dir, script, started, prof, top, memory=None):
+    """반환: (.prof 경로, .txt 경로)"""
+    prof_dir = os.path.join(out_dir, "profile")
+    os.makedirs(prof_dir, exist_ok=True)
+    stem = os.path.join(prof_dir, f"{script}-{started.strftime('%Y%m%d-%H%M%S')}")
+    prof.dump_stats(stem + ".prof")
+    with open(stem + ".txt", "w", encoding="utf-8") as f:
+        f.write(f"# {script} 프로파일 ({started.strftime('%Y-%m-%d %H:%M:%S')})\n\n")
+        f.write(f"## 누적 시간 상위 {top}\n")
+        f.write(stats_text(prof, "cumulative", top))
+        f.write(f"\n## 자체 시간 상위 {top}\n")
+        f.write(stats_text(prof, "tottime", top))
+        if memory is not None:
+            f.write("\n## 메모리\n")
+            f.write(memory_text(*memory, top))
+    return stem + ".prof", stem + ".txt"
+
+@contextmanager
+def profiled(out_dir, script, enabled=True, memory=False, top=PROFILE_TOP):
+    """with profiled(OUT_DIR, "auto_fffd_apply", args.profile): ... — enabled가 False면 아무것도 안 함"""
+    if not (enabled or memory):
+        yield
+        return
+    started = dt.datetime.now()
+    if memory:
+        tracemalloc.start()
+    prof = cProfile.Profile()
+    prof.enable()
+    try:
+        yield
+    finally:
+        prof.disable()
+        mem = None
+        if memory:
+            mem = (tracemalloc.take_snapshot(), tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+        paths = write_profile(out_dir, script, started, prof, top, mem)
+        print("[PROFILE]", " / ".join(paths))
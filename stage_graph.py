@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+"""
+단계 그래프 실행기 (make 방식) — pharmalex.py run-all에서 사용
+
+- 단계 선언: {"name", "inputs": [경로], "outputs": [경로], "config": 서명에 넣을 설정, "run": 인자 없는 호출 객체}
+  · run은 프로세스로 보낼 수 있어야 함 (모듈 최상위 함수 + functools.partial)
+  · 선택 "prepare": 실행 전에 현재 프로세스에서 부를 호출 객체 (같은 차례 단계들이 같은 입력을
+    각자 읽지 않도록 미리 메모리에 올려 둠 — fork한 워커가 그대로 물려받음; 여러 번 불려도 되어야 함)
+- 의존 관계는 선언에서 자동으로: 어떤 단계의 입력이 다른 단계의 출력이면 그 단계 뒤에 실행
+- 서명 = sha256(설정 + 입력 파일별 내용 해시, 없는 파일은 None; 디렉터리는 안의 파일 해시 목록)
+  지난 실행과 서명이 같고 출력 파일 내용도 그때 그대로면 건너뜀
+  · 상위 단계가 다시 돌았어도 출력 내용이 같으면 하위 단계는 건너뜀
+- 상태: <state_path> JSON {단계: {"signature", "outputs": {경로: 해시}}} — 단계가 끝날 때마다 저장
+- 같은 차례(wave)에서 서로 독립인 단계는 프로세스로 동시에 실행 (parallel=False면 현재 프로세스에서 순서대로)
+- 실패한 단계의 하위 단계는 실행하지 않음(blocked)
+"""
+
+import os, json, time, hashlib
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+from pdf_text_cache import file_sha256
+
+STATE_VERSION = 1
+
+def load_state(path) -> dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    return data.get("stages", {}) if data.get("version") == STATE_VERSION else {}
+
+def save_state(path, stages: dict):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump({"version": STATE_VERSION, "stages": stages}, f, ensure_ascii=False, indent=2)
+    os.replace(path + ".tmp", path)
+
+def content_hash(path):
+    """파일 내용 해시 / 디렉터리(Parquet 묶음 등)는 안의 파일 이름+해시 목록의 해시 / 없으면 None"""
+    if os.path.isdir(path):
+        h = hashlib.sha256()
+        for name in sorted(os.listdir(path)):
+            sub = os.path.join(path, name)
+            if os.path.isfile(sub):
+                h.update(f"{name}={file_sha256(sub)}\n".encode("utf-8", "surrogatepass"))
+        return h.hexdigest()
+    return file_sha256(path) if os.path.isfile(path) else None
+
+def stage_signature(stage) -> str:
+    parts = [repr(stage.get("config"))]
+    parts += [f"{os.path.normpath(p)}={content_hash(p)}" for p in stage["inputs"]]
+    return hashlib.sha256("\n".join(parts).encode("utf-8", "surrogatepass")).hexdigest()
+
+def up_to_date(entry, signature, outputs) -> bool:
+    if not entry or entry.get("signature") != signature:
+        return False
+    recorded = entry.get("outputs", {})
+    return all(recorded.get(p) is not None and recorded.get(p) == content_hash(p) for p in outputs)
+
+def plan_waves(stages):
+    """선언 순서를 유지한 위상 정렬 → [[단계, ...], ...] (같은 리스트 안은 서로 독립)"""
+    producer = {os.path.normpath(o): s["name"] for s in stages for o in s["outputs"]}
+    deps = {s["name"]: {producer[os.path.normpath(i)] for i in s["inputs"]
+                        if producer.get(os.path.normpath(i), s["name"]) != s["name"]}
+            for s in stages}
+    waves, done, remaining = [], set(), list(stages)
+    while remaining:
+        wave = [s for s in remaining if deps[s["name"]] <= done]
+        if not wave:
+            raise ValueError("단계 의존 관계에 순환이 있음: " + ", ".join(s["name"] for s in remaining))
+        waves.append(wave)
+        done |= {s["name"] for s in wave}
+        remaining = [s for s in remaining if s["name"] not in done]
+    return waves, deps
+
+def run_graph(stages, state_path, force=False, parallel=True, max_workers=None):
+    """
+    반환: {단계: "skipped" | "ran" | "failed" | "blocked"} (선언 순서)
+    force=True면 서명과 관계없이 전부 실행
+    """
+    state = load_state(state_path)
+    waves, deps = plan_waves(stages)
+    status = {}
+    for wave in waves:
+        todo = []
+        for s in wave:
+            name = s["name"]
+            if any(status[d] in ("failed", "blocked") for d in deps[name]):
+                status[name] = "blocked"
+                print(f"[DAG] {name}: 상위 단계 실패로 실행 안 함")
+                continue
+            sig = stage_signature(s)
+            if not force and up_to_date(state.get(name), sig, s["outputs"]):
+                status[name] = "skipped"
+                print(f"[DAG] {name}: 입력·출력 변경 없음 → 건너뜀")
+                continue
+            todo.append((s, sig))
+        if not todo:
+            continue
+        print(f"[DAG] 실행: {', '.join(s['name'] for s, _ in todo)}"
+              + (" (동시)" if parallel and len(todo) > 1 else ""))
+        for s, _ in todo:
+            if s.get("prepare"):
+                try:
+                    s["prepare"]()
+                except Exception as e:
+                    # 준비 실패는 단계 실행에서 다시 드러나므로 여기서는 알리기만 함
+                    print(f"[DAG] {s['name']}: 준비 실패 — {e!r}")
+        for (s, sig), error, seconds in run_wave(todo, parallel, max_workers):
+            name = s["name"]
+            if error is None:
+                status[name] = "ran"
+                state[name] = {"signature": sig, "outputs": {p: content_hash(p) for p in s["outputs"]}}
+                print(f"[DAG] {name}: 완료 ({seconds:.1f}s)")
+            else:
+                status[name] = "failed"
+                state.pop(name, None)
+                print(f"[DAG] {name}: 실패 ({seconds:.1f}s) — {error!r}")
+            save_state(state_path, state)
+    return {s["name"]: status[s["name"]] for s in stages}
+
+def timed_call(fn):
+    t0 = time.perf_counter()
+    fn()
+    return time.perf_counter() - t0
+
+def run_wave(todo, parallel, max_workers):
+    """반환: [((단계, 서명), 예외 또는 None, 초), ...] (todo 순서)"""
+    if not parallel or len(todo) < 2:
+        results = []
+        for item in todo:
+            t0 = time.perf_counter()
+            try:
+                item[0]["run"]()
+                results.append((item, None, time.perf_counter() - t0))
+            except Exception as e:
+                results.append((item, e, time.perf_counter() - t0))
+        return results
+    methods = mp.get_all_start_methods()
+    ctx = mp.get_context("fork" if "fork" in methods else None)
+    with ProcessPoolExecutor(max_workers=max_workers or len(todo), mp_context=ctx) as ex:
+        futures = [(item, ex.submit(timed_call, item[0]["run"]), time.perf_counter()) for item in todo]
+        results = []
+        for item, fut, t0 in futures:
+            try:
+                results.append((item, None, fut.result()))
+            except Exception as e:
+                results.append((item, e, time.perf_counter() - t0))
+        return results
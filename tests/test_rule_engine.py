@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""
+rule_engine 단일 스캔 엔진 = 규칙별 순차 re.subn 확인 + 합칠 수 없는 규칙 거부 확인
+
+  python -m pytest -q tests
+"""
+
+import os, re, sys, copy, random
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from rule_engine import compile_rules, apply_rules, combine_errors
+from rule_pack import load_rule_pack, validate_rule_pack, RULES_PATH
+
+try:
+    import tomllib  # Python 3.11+
+except ImportError:  # pragma: no cover
+    import tomli as tomllib
+
+HEURISTICS = load_rule_pack(cache_dir=None)["heuristics"]
+
+SAMPLES = [
+    "Interferon �-2a 주사제 (300�g/0.1ml)",
+    "TNF-� inhibitor 사용 시, � blocker 병용",
+    "peginterferon �-1a 주사제, 5 � m l 또는 5�l",
+    "700�g 1일 1회, 10.5 � G, �-interferon",
+    "정상 문자열 α-blocker 10 ㎍",
+    "",
+]
+FRAGMENTS = ["700", "10.5", "5", " ", "�", "g", "G", "m l", "l", "-", "blocker", "interferon",
+             "peginterferon ", "1", "a", "주사제", "(", ")", "/", "α", "\n"]
+
+def sequential(rules, text):
+    """기존 방식: 규칙 순서대로 subn → (결과, 로그)"""
+    applied = []
+    for rgx, repl in rules:
+        text, n = rgx.subn(repl, text)
+        if n:
+            applied.append(f"{rgx.pattern} -> {repl} x{n}")
+    return text, applied
+
+def random_texts(n, seed=0):
+    rng = random.Random(seed)
+    return ["".join(rng.choice(FRAGMENTS) for _ in range(rng.randint(1, 12))) for _ in range(n)]
+
+@pytest.mark.parametrize("text", SAMPLES + random_texts(2000))
+def test_combined_engine_matches_sequential_sub(text):
+    engine = compile_rules(HEURISTICS)
+    assert apply_rules(engine, text) == sequential(HEURISTICS, text)
+
+def test_templates_are_shifted_to_combined_groups():
+    rules = [(re.compile(r"(x)(y)"), r"\2\1"), (re.compile(r"(a)(b)", re.I), r"\g<2>-\1")]
+    engine = compile_rules(rules)
+    for text in ["xy ab AB", "abxy", "yx"]:
+        assert apply_rules(engine, text) == sequential(rules, text)
+
+@pytest.mark.parametrize("pattern", [r"(a)\1", r"(a)(?(1)b|c)", r"(?P<r0>x)", r"(?P<r1>a)(?P=r1)", r"(?i)abc"])
+def test_uncombinable_patterns_rejected(pattern):
+    assert combine_errors(pattern)
+    with pytest.raises(ValueError):
+        compile_rules([(re.compile(r"\d+"), "#"), (pattern, "")])
+    with open(RULES_PATH, "rb") as f:
+        raw = tomllib.load(f)
+    bad = copy.deepcopy(raw)
+    bad["heuristics"].append({"pattern": pattern, "repl": ""})
+    with pytest.raises(ValueError):
+        validate_rule_pack(bad)
+
+@pytest.mark.parametrize("pattern", [r"(?i:abc)", r"[\1]", r"\012", r"\\1", r"(?P<name>a)(?P=name)"])
+def test_combinable_patterns_accepted(pattern):
+    assert combine_errors(pattern) == []
+
+def test_template_reference_beyond_rule_groups_rejected():
+    with pytest.raises(ValueError):
+        compile_rules([(re.compile(r"(a)"), r"\2"), (re.compile(r"(b)"), "")])
@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+"""
+unit_normalizer.prefilter_mask: 사전 필터가 정규화(normalize_cell)가 바꾸는 셀을 놓치지 않는지 확인
+
+  python -m pytest -q tests
+"""
+
+import os, sys, importlib.util
+import pandas as pd
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+from unit_normalizer import prefilter_mask
+
+def load_script(name, rel_path):
+    # archive/ 스크립트는 패키지가 아니므로 파일 경로로 로드
+    spec = importlib.util.spec_from_file_location(name, os.path.join(ROOT, rel_path))
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
+
+sentinel_pipeline = load_script("sentinel_pipeline", os.path.join("archive", "development", "sentinel_pipeline.py"))
+
+CELLS = [
+    "300\xa0mcg 주사",      # NBSP
+    "5　ug 정",         # 전각 공백 U+3000
+    "１g 정",               # 전각 숫자
+    "２０\xa0g 캡슐",
+    "10 mcg 주사",
+    "혈장 5 g/dl",
+    "변경 없음",
+    "",
+]
+
+@pytest.mark.parametrize("dtype", [None, object, "str"])
+def test_prefilter_keeps_every_cell_normalize_changes(dtype):
+    values = pd.Series(CELLS, dtype=dtype)
+    mask = prefilter_mask(values, sentinel_pipeline.PREFILTER_RE).to_numpy()
+    for cell, passed in zip(CELLS, mask):
+        out, logs, reviews = sentinel_pipeline.normalize_cell(cell)
+        if out != cell or logs or reviews:
+            assert passed, cell
+
+def test_unicode_cells_are_normalized():
+    assert sentinel_pipeline.normalize_cell("300\xa0mcg 주사")[0] == "300 ㎍ 주사"
+    assert sentinel_pipeline.normalize_cell("5　ug 정")[0] == "5 ㎍ 정"
+    assert sentinel_pipeline.normalize_cell("１g 정")[0] == "１ ㎍ 정"
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""
+단위 정규화 단일 스캔 엔진 — ASCII ug/mcg → ㎍ + 조건부 g → ㎍ 를 셀당 한 번에
+(sentinel_pipeline.normalize_workbook / pharmalex_sentinel_fix.process_dataframe 공용)
+
+- compile_unit_rules: 규칙 팩 [normalize]의 ascii_micro / g_value 정규식을 rule_engine.compile_rules로
+  하나로 합침 (같은 위치에서는 ascii_micro 우선)
+- normalize_units: finditer 한 번으로 두 규칙 매칭을 모두 모은 뒤
+  1) ASCII 매칭은 바로 치환
+  2) g 매칭은 'ASCII 치환 후 셀 문자열' 기준 문맥 판정으로 치환/검토
+  → 기존 순차 처리(ASCII_MICRO_RE.subn → G_VALUE_RE.sub)와 같은 결과·같은 로그 순서
+    (두 규칙 매칭은 서로 겹칠 수 없고, ASCII 치환 결과 "<값> ㎍"에는 g 매칭이 생기지 않음)
+- prefilter_mask: 규칙 팩 prefilter로 컬럼 단위 사전 필터 (숫자+단위 글자가 없는 셀은 정규식 생략)
+"""
+
+import numpy as np
+import pandas as pd
+from rule_engine import compile_rules
+
+def compile_unit_rules(ascii_micro_re, g_value_re):
+    """반환: (combined_regex, ascii 바깥 그룹 번호, g 바깥 그룹 번호)"""
+    combined, owner, _ = compile_rules([(ascii_micro_re, ""), (g_value_re, "")])
+    group_of = {i: g for g, i in owner.items()}
+    return combined, group_of[0], group_of[1]
+
+def normalize_units(cell_text, engine, classify, should_convert):
+    """
+    classify(context_text) -> 문맥 플래그 (g 매칭이 있을 때 셀당 한 번)
+    should_convert(context_text, g_value, flags) -> (ok, reason)
+    반환: (정규화 결과, 치환 로그 [(rule, before, after, detail)], 검토 [(rule, before, suggested, detail)])
+    """
+    combined, asc_group, g_group = engine
+    pieces, asc_logs, g_slots = [], [], []
+    pos = 0
+    for m in combined.finditer(cell_text):
+        pieces.append(cell_text[pos:m.start()])
+        pos = m.end()
+        before = m.group(0)
+        if m.group(asc_group) is not None:
+            val, unit = m.group(asc_group + 1), m.group(asc_group + 2)
+            after = f"{val} ㎍"
+            asc_logs.append(("ascii_micro", before, after, f"{unit} -> ㎍"))
+            pieces.append(after)
+        else:
+            g_slots.append((len(pieces), m.group(g_group + 1), before))
+            pieces.append(before)
+    if not pieces:
+        return cell_text, [], []
+    pieces.append(cell_text[pos:])
+
+    g_logs, reviews = [], []
+    if g_slots:
+        context_text = "".join(pieces)
+        flags = classify(context_text)
+        for slot, val, before in g_slots:
+            ok, reason = should_convert(context_text, float(val), flags)
+            if ok:
+                pieces[slot] = f"{val} ㎍"
+                g_logs.append(("g_to_micro_conditional", before, pieces[slot], reason))
+            else:
+                reviews.append(("g_to_micro_review", before, f"{val} ㎍ (검토)", reason))
+    return "".join(pieces), asc_logs + g_logs, reviews
+
+def prefilter_mask(values, prefilter_re):
+    """
+    문자열 Series → 정규화 대상 여부 bool Series (prefilter_re가 None이면 전부 True)
+    · 뒤따르는 정규화와 같은 파이썬 re로 판정 — pandas 문자열(Arrow) 컬럼의 .str.contains는 RE2로 돌아
+      \\d·\\s가 ASCII만 잡으므로 NBSP·전각 공백/숫자 셀을 놓침
+    """
+    if prefilter_re is None:
+        return values.notna()
+    search = prefilter_re.search
+    mask = np.fromiter((isinstance(v, str) and search(v) is not None for v in values), bool, len(values))
+    return pd.Series(mask, index=values.index)
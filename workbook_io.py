@@ -0,0 +1,342 @@
+# -*- coding: utf-8 -*-
+"""
+엑셀 워크북 입출력 공용 모듈 (build_mapping_from_pdf / auto_fffd_apply / sentinel_pipeline)
+
+- read_workbook: 워크북을 한 번만 열어(openpyxl read-only) 모든 시트를 문자열 DataFrame으로 반환
+  · pd.read_excel(path, sheet_name=s, dtype=str)를 시트마다 호출하던 것과 결과 동일
+  · 같은 프로세스 안에서는 (경로, 수정시각, 크기) 기준으로 파싱 결과를 재사용
+    (최근에 읽은 WORKBOOK_CACHE_SIZE개만 유지 — 배치 모드처럼 여러 엑셀을 차례로 읽어도 메모리가 쌓이지 않음)
+- write_workbook: 경로 확장자에 따라 xlsx(최종 산출물) 또는 Parquet 묶음(단계 간 중간 산출물)으로 저장
+  · xlsx는 openpyxl write-only 모드로 시트별 행을 바로 흘려 씀 (셀 객체 그래프를 메모리에 만들지 않음)
+    헤더 1행 + 값(결측은 빈 셀) — pd.read_excel로 다시 읽으면 ExcelWriter 경로와 같은 DataFrame
+  · Parquet 묶음 = <이름>.parquet/ 디렉터리 (시트별 sheet_NNN.parquet + sheets.json 목차)
+  · 시트 이름/순서, 컬럼 이름/순서, 문자열 셀(결측은 NaN)을 그대로 보존
+  · pyarrow가 없으면 intermediate_path가 xlsx 경로를 돌려주므로 기존과 같이 동작
+- patch_workbook: 원본 xlsx에서 지정한 셀만 고쳐 저장 (pandas 재직렬화 없음)
+  · 시트 XML의 해당 <c> 요소만 바꿔 끼우므로 서식·열너비·병합·다른 시트·차트까지 그대로
+  · 수식 셀/빈 셀 등은 openpyxl 로드·저장으로 대체 (이 경우 openpyxl 미지원 요소는 보존 안 됨)
+"""
+
+import os, re, json, importlib.util
+from collections import Counter
+import numpy as np
+import pandas as pd
+from run_metrics import timer, count
+
+INTERMEDIATE_EXT = ".parquet"
+STREAM_XLSX = True   # False면 기존 pd.ExcelWriter(openpyxl) 경로
+SHEET_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+CELL_OPEN_RE = re.compile(r'<c r="([A-Z]+[0-9]+)"[\s>/]')
+MANIFEST_NAME = "sheets.json"
+SHEET_FILE_RE = re.compile(r"sheet_[0-9]+\.parquet")
+
+# (절대경로, mtime_ns, size) → {시트명: DataFrame}  (삽입 순서 = 최근 사용 순서)
+WORKBOOK_CACHE = {}
+WORKBOOK_CACHE_SIZE = 2   # run-all에서 build-mapping·autofix가 같은 원본을 이어 읽는 정도면 충분
+
+def has_parquet():
+    return importlib.util.find_spec("pyarrow") is not None
+
+def is_parquet_bundle(path):
+    return str(path).endswith(INTERMEDIATE_EXT)
+
+def intermediate_path(out_dir, stem):
+    """단계 간 중간 산출물 경로 (pyarrow 없으면 .xlsx)"""
+    return os.path.join(out_dir, stem + (INTERMEDIATE_EXT if has_parquet() else ".xlsx"))
+
+def workbook_key(xlsx_path):
+    # Parquet 묶음은 마지막에 교체되는 목차 파일 기준
+    stat_path = os.path.join(xlsx_path, MANIFEST_NAME) if is_parquet_bundle(xlsx_path) else xlsx_path
+    st = os.stat(stat_path)
+    return (os.path.abspath(xlsx_path), st.st_mtime_ns, st.st_size)
+
+def write_parquet_bundle(bundle_dir, sheets):
+    os.makedirs(bundle_dir, exist_ok=True)
+    entries = []
+    for i, (name, df) in enumerate(sheets.items()):
+        fname = f"sheet_{i:03d}.parquet"
+        out = df.reset_index(drop=True)
+        # Parquet 컬럼명은 문자열·중복불가 → 위치 기반 이름으로 저장, 원래 이름은 목차에
+        out.columns = [f"c{j}" for j in range(out.shape[1])]
+        out.to_parquet(os.path.join(bundle_dir, fname), index=False)
+        entries.append({"name": name, "file": fname, "columns": list(df.columns)})
+    tmp = os.path.join(bundle_dir, MANIFEST_NAME + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"version": 1, "sheets": entries}, f, ensure_ascii=False, default=str)
+    os.replace(tmp, os.path.join(bundle_dir, MANIFEST_NAME))
+    # 시트 수가 줄어든 재저장이면 목차에 없는 이전 시트 파일 정리
+    listed = {e["file"] for e in entries}
+    for fname in os.listdir(bundle_dir):
+        if SHEET_FILE_RE.fullmatch(fname) and fname not in listed:
+            os.remove(os.path.join(bundle_dir, fname))
+
+def read_parquet_bundle(bundle_dir):
+    with open(os.path.join(bundle_dir, MANIFEST_NAME), encoding="utf-8") as f:
+        manifest = json.load(f)
+    sheets = {}
+    for e in manifest["sheets"]:
+        df = pd.read_parquet(os.path.join(bundle_dir, e["file"]))
+        # 결측은 read_excel(dtype=str)과 같이 NaN으로
+        for c in df.columns:
+            df[c] = df[c].where(df[c].notna(), np.nan)
+        df.columns = e["columns"]
+        sheets[e["name"]] = df
+    return sheets
+
+def iter_sheet_rows(df, chunk_rows=50_000):
+    """DataFrame → 행 리스트 (결측은 None). 큰 시트도 chunk_rows씩만 object로 변환"""
+    for start in range(0, len(df), chunk_rows):
+        part = df.iloc[start:start + chunk_rows].astype(object)
+        part = part.where(part.notna(), None)
+        yield from part.itertuples(index=False, name=None)
+
+def write_xlsx_streaming(path, sheets):
+    from openpyxl import Workbook
+    wb = Workbook(write_only=True)
+    for sheet, df in sheets.items():
+        ws = wb.create_sheet(title=sheet)
+        ws.append(list(df.columns))
+        for row in iter_sheet_rows(df):
+            ws.append(row)
+    wb.save(path)
+
+def write_workbook(path, sheets, stream=None):
+    """
+    {시트명: DataFrame} 저장. *.parquet → 중간 산출물 묶음, 그 외 → xlsx
+    stream: xlsx를 write-only로 흘려 쓸지 (기본 STREAM_XLSX)
+    """
+    count("workbook.rows_written", sum(len(df) for df in sheets.values()))
+    if is_parquet_bundle(path):
+        with timer("workbook.write_parquet"):
+            write_parquet_bundle(path, sheets)
+        return
+    if STREAM_XLSX if stream is None else stream:
+        with timer("workbook.write_xlsx"):
+            write_xlsx_streaming(path, sheets)
+        return
+    with timer("workbook.write_xlsx"):
+        writer = pd.ExcelWriter(path, engine="openpyxl")
+        for sheet, df in sheets.items():
+            df.to_excel(writer, sheet_name=sheet, index=False)
+        writer.close()
+
+def excel_header_names(ws):
+    """1행 헤더 → pd.read_excel 컬럼 이름 (빈칸은 'Unnamed: i', 중복은 'x.1', 'x.2' …)"""
+    names, seen = [], Counter()
+    for i, cell in enumerate(next(ws.iter_rows(min_row=1, max_row=1), ())):
+        name = f"Unnamed: {i}" if cell.value is None else str(cell.value)
+        base = name
+        while name in seen:
+            name = f"{base}.{seen[base]}"
+            seen[base] += 1
+        seen[name] += 1
+        names.append(name)
+    return names
+
+def resolve_patch_column(src, sheet, column, headers, by_name):
+    # by_name=False면 0-based 위치 그대로, True면 헤더 이름을 1행에서 찾아 위치로 (시트별 한 번만 읽음)
+    # (타입으로 추측하지 않음 — read_excel은 숫자 헤더 2023 같은 컬럼 이름을 int로 돌려줌)
+    if not by_name:
+        return int(column)
+    if sheet not in headers:
+        from openpyxl import load_workbook
+        wb = load_workbook(src, read_only=True)
+        headers[sheet] = excel_header_names(wb[sheet]) if sheet in wb.sheetnames else []
+        wb.close()
+    names = headers[sheet]
+    return names.index(str(column)) if str(column) in names else None
+
+def xlsx_sheet_parts(zf):
+    """{시트명: zip 안의 시트 XML 경로}"""
+    import xml.etree.ElementTree as ET
+    rel_ns = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+    wb = ET.fromstring(zf.read("xl/workbook.xml"))
+    rels = ET.fromstring(zf.read("xl/_rels/workbook.xml.rels"))
+    targets = {r.get("Id"): r.get("Target") for r in rels}
+    parts = {}
+    for sh in wb.iter():
+        if sh.tag.endswith("}sheet"):
+            target = targets.get(sh.get(rel_ns + "id"), "")
+            parts[sh.get("name")] = target.lstrip("/") if target.startswith("/") else "xl/" + target
+    return parts
+
+def xlsx_shared_strings(zf):
+    import xml.etree.ElementTree as ET
+    if "xl/sharedStrings.xml" not in zf.namelist():
+        return []
+    root = ET.fromstring(zf.read("xl/sharedStrings.xml"))
+    t_tag, r_tag = f"{{{SHEET_NS}}}t", f"{{{SHEET_NS}}}r"
+    # <si><t>…</t></si> 또는 서식 run <si><r><t>…</t></r>…</si> (윗주 rPh는 제외)
+    return ["".join((x.text or "") if x.tag == t_tag else "".join(t.text or "" for t in x.iter(t_tag))
+                    for x in si if x.tag in (t_tag, r_tag))
+            for si in root if si.tag.endswith("}si")]
+
+def xml_cell_value(elem_xml, shared):
+    """
+    <c> 요소 문자열 → 셀 문자열 값 또는 None(빈 셀)
+    문자열 셀이 아니면(숫자·날짜·수식 등) NotImplemented → openpyxl 경로에서 처리
+    """
+    import xml.etree.ElementTree as ET
+    try:
+        c = ET.fromstring(elem_xml.replace("<c ", f'<c xmlns="{SHEET_NS}" ', 1))
+    except ET.ParseError:
+        return NotImplemented
+    kids = {k.tag.split("}")[1] for k in c}
+    t = c.get("t", "n")
+    if "f" in kids:
+        return NotImplemented
+    if t == "inlineStr":
+        return "".join(x.text or "" for x in c.iter(f"{{{SHEET_NS}}}t")) if "is" in kids else None
+    if "v" not in kids:
+        return None
+    if t == "s":
+        return shared()[int(c.find(f"{{{SHEET_NS}}}v").text)]
+    return NotImplemented
+
+def patch_xlsx_xml(src, dst, patches, by_name=False):
+    """
+    시트 XML에서 대상 <c> 요소만 인라인 문자열로 바꿔 끼움 (나머지 zip 항목은 그대로 복사)
+    반환: (적용 수, 건너뜀 목록) — 이 방식으로 처리할 수 없는 셀이 있으면 None
+    """
+    import zipfile
+    from xml.sax.saxutils import escape
+    from openpyxl.utils import get_column_letter
+    from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+
+    headers, by_part, skipped = {}, {}, []
+    applied = 0
+    with zipfile.ZipFile(src) as zf:
+        parts = xlsx_sheet_parts(zf)
+        sst = []
+        def shared():
+            if not sst:
+                sst.append(xlsx_shared_strings(zf))
+            return sst[0]
+
+        for patch in patches:
+            sheet, row, column, after, before = patch
+            if sheet not in parts:
+                skipped.append((patch, "시트 없음"))
+                continue
+            col = resolve_patch_column(src, sheet, column, headers, by_name)
+            if col is None:
+                skipped.append((patch, "컬럼 없음"))
+                continue
+            if not isinstance(after, str) or ILLEGAL_CHARACTERS_RE.search(after):
+                return None
+            ref = f"{get_column_letter(col + 1)}{int(row)}"
+            by_part.setdefault(parts[sheet], {})[ref] = patch
+
+        patched = {}
+        for part, targets in by_part.items():
+            data = zf.read(part).decode("utf-8")
+            out, pos, done = [], 0, set()
+            for m in CELL_OPEN_RE.finditer(data):
+                ref = m.group(1)
+                if ref not in targets:
+                    continue
+                start = m.start()
+                head_end = data.index(">", start)
+                end = head_end + 1 if data[head_end - 1] == "/" else data.index("</c>", head_end) + 4
+                elem = data[start:end]
+                current = xml_cell_value(elem, shared)
+                if current is NotImplemented:
+                    return None  # 수식(calcChain)·숫자/날짜 셀 → openpyxl 경로로
+                patch = targets[ref]
+                done.add(ref)
+                if patch[4] is not None and current != patch[4]:
+                    skipped.append((patch, "기존 값 불일치"))
+                    continue
+                applied += 1
+                style = re.search(r'\ss="([0-9]+)"', data[start:head_end])
+                style_attr = f' s="{style.group(1)}"' if style else ""
+                out.append(data[pos:start])
+                out.append(f'<c r="{ref}"{style_attr} t="inlineStr"><is><t xml:space="preserve">'
+                           f'{escape(patch[3])}</t></is></c>')
+                pos = end
+            if set(targets) - done:
+                return None  # 빈 셀(요소 없음)이나 비표준 XML → openpyxl 경로로
+            out.append(data[pos:])
+            patched[part] = "".join(out).encode("utf-8")
+
+        tmp = dst + ".tmp"
+        with zipfile.ZipFile(tmp, "w", zipfile.ZIP_DEFLATED) as zout:
+            for item in zf.infolist():
+                zout.writestr(item, patched.get(item.filename) or zf.read(item.filename),
+                              compress_type=item.compress_type)
+    os.replace(tmp, dst)
+    return applied, skipped
+
+def patch_workbook_openpyxl(src, dst, patches, by_name=False):
+    from openpyxl import load_workbook
+    wb = load_workbook(src, keep_vba=str(src).lower().endswith(".xlsm"))
+    headers = {}
+    applied, skipped = 0, []
+    for patch in patches:
+        sheet, row, column, after, before = patch
+        if sheet not in wb.sheetnames:
+            skipped.append((patch, "시트 없음"))
+            continue
+        col = resolve_patch_column(src, sheet, column, headers, by_name)
+        if col is None:
+            skipped.append((patch, "컬럼 없음"))
+            continue
+        cell = wb[sheet].cell(row=int(row), column=col + 1)
+        current = None if cell.value is None else str(cell.value)
+        if before is not None and current != before:
+            skipped.append((patch, "기존 값 불일치"))
+            continue
+        cell.value = after
+        applied += 1
+    wb.save(dst)
+    return applied, skipped
+
+def patch_workbook(src, dst, patches, by_name=False):
+    """
+    원본 xlsx(src)의 지정 셀만 바꿔 dst로 저장 (src == dst도 가능)
+    patches: [(시트명, 엑셀 행번호, 컬럼, 새 값, 기존 값), ...]
+      · 컬럼: 0-based 위치 (by_name=True면 헤더 이름 — read_excel 컬럼 이름 규칙, 숫자 헤더도 그대로 이름으로 취급)
+      · 기존 값이 None이 아니면 현재 셀 값과 같을 때만 적용 (원본이 그새 바뀌었으면 건너뜀)
+    우선 시트 XML의 해당 셀만 바꿔 끼우고(수정 시간 ∝ 고친 셀 수 + zip 복사),
+    수식 셀·빈 셀 등 그 방식으로 안전하게 못 고치는 경우에만 openpyxl 전체 로드/저장으로 처리
+    반환: (적용 수, [(패치, 건너뛴 사유), ...])
+    """
+    patches = list(patches)
+    with timer("workbook.patch_xlsx"):
+        result = patch_xlsx_xml(src, dst, patches, by_name)
+        if result is None:
+            count("workbook.patch_fallback")
+            result = patch_workbook_openpyxl(src, dst, patches, by_name)
+    count("workbook.cells_patched", result[0])
+    return result
+
+def remember_workbook(key, sheets):
+    # 같은 경로의 이전 버전은 버리고, 가장 오래 안 쓴 것부터 WORKBOOK_CACHE_SIZE개만 남김
+    for old in [k for k in WORKBOOK_CACHE if k[0] == key[0]]:
+        del WORKBOOK_CACHE[old]
+    WORKBOOK_CACHE[key] = sheets
+    while len(WORKBOOK_CACHE) > WORKBOOK_CACHE_SIZE:
+        del WORKBOOK_CACHE[next(iter(WORKBOOK_CACHE))]
+
+def read_workbook(xlsx_path, copy=True):
+    """
+    {시트명: 문자열 DataFrame} (시트 순서 유지). xlsx 또는 Parquet 묶음 경로 모두 가능.
+    copy=False면 캐시된 DataFrame을 그대로 돌려주므로 호출측에서 수정하면 안 된다.
+    """
+    key = workbook_key(xlsx_path)
+    sheets = WORKBOOK_CACHE.pop(key, None)
+    count("workbook_cache.hit" if sheets is not None else "workbook_cache.miss")
+    if sheets is None and is_parquet_bundle(xlsx_path):
+        with timer("workbook.read_parquet"):
+            sheets = read_parquet_bundle(xlsx_path)
+    elif sheets is None:
+        # sheet_name=None → 파일을 한 번 열어 전체 시트 파싱 (pandas openpyxl 엔진은 read-only 모드)
+        with timer("workbook.read_xlsx"):
+            sheets = pd.read_excel(xlsx_path, sheet_name=None, dtype=str, engine="openpyxl")
+    remember_workbook(key, sheets)
+    if not copy:
+        return sheets
+    return {name: df.copy() for name, df in sheets.items()}
+
+def clear_workbook_cache():
+    WORKBOOK_CACHE.clear()